@@ -0,0 +1,195 @@
+"""
+    Scores prediction models against every day of historical weather data.
+
+    Models which can forecast each day at once, such as SimplePrediction,
+    find every day's window statistics from the data's prefix sums and
+    sparse tables in one pass. Models which are updated in place are pushed
+    each day instead, and any other model is made from a view of the data
+    before each day.
+
+    backtest: Forecasts every day from the days before it.
+    score: Mean absolute and root mean square error of forecasts.
+    evaluate: Scores one prediction model over the whole history.
+    fit_ensemble_weights: Weights models by their errors over the history.
+"""
+
+import sys
+from array import array
+from functools import partial
+from math import sqrt
+
+from weather_data import WeatherData, WeatherDataView
+from prediction import (YesterdaysWeather, SimplePrediction,
+                        SophisticatedPrediction, EnsemblePrediction,
+                        EnsembleWeights, save_ensemble_weights)
+
+# Field of the weather data each numeric forecast field is compared with.
+OBSERVED_FIELDS = {"high_temperature": "temperature_high",
+                   "low_temperature": "temperature_low",
+                   "humidity": "humidity",
+                   "cloud_cover": "cloud_cover",
+                   "wind_speed": "wind_speed_average"}
+
+# Rainfall (mm) at or above which a day counts as having rained; the chance
+# of rain is compared with 100 on those days and 0 on the others.
+RAIN_THRESHOLD = 0.1
+
+# Number of days used by the simple and sophisticated models by default.
+DEFAULT_N_DAYS = 10
+
+# Name of each model scored by main, and a function creating it from data.
+MODELS = (("Yesterday's weather", YesterdaysWeather),
+          ("Simple prediction", partial(SimplePrediction,
+                                        n_days=DEFAULT_N_DAYS)),
+          ("Sophisticated prediction", partial(SophisticatedPrediction,
+                                               n_days=DEFAULT_N_DAYS)))
+
+
+def backtest(weather_data, make_model, first_day=1):
+    """Forecasts every day of weather data from the days before it.
+
+    Models which can forecast each day at once, such as SimplePrediction,
+    are made once and asked to. Models which can be pushed new days, such
+    as ExponentialSmoothingPrediction, are made once and then pushed each
+    day in turn. Either way each day costs the same however long the
+    history is.
+
+    Parameters:
+        weather_data (WeatherData): Collection of weather data.
+        make_model (function): Creates a WeatherPrediction from weather data,
+                               e.g. YesterdaysWeather.
+        first_day (int): Position of the first day to forecast.
+
+    Pre-condition:
+        0 < first_day
+
+    Return:
+        (list[Forecast]) Forecast of each day from first_day onwards.
+    """
+    if first_day >= weather_data.size():
+        return []
+    model = make_model(WeatherDataView(weather_data, first_day))
+    if hasattr(model, "forecast_each_day"):
+        return model.forecast_each_day(weather_data, first_day)
+    forecasts = [model.forecast()]
+    for day in range(first_day + 1, weather_data.size()):
+        if hasattr(model, "push"):
+            model.push(WeatherDataView(weather_data, day).get_data(1)[0])
+        else:
+            model = make_model(WeatherDataView(weather_data, day))
+        forecasts.append(model.forecast())
+    return forecasts
+
+
+def score(weather_data, forecasts, first_day=1):
+    """Measures the error of forecasts of weather data.
+
+    Parameters:
+        weather_data (WeatherData): Collection of weather data forecast.
+        forecasts (list[Forecast]): Forecast of each day from first_day, as
+                                    returned by backtest.
+        first_day (int): Position of the day of the first forecast.
+
+    Pre-condition:
+        len(forecasts) > 0
+
+    Return:
+        (dict<str, tuple<float, float>>) Mean absolute error and root mean
+            square error of each Forecast field.
+    """
+    number_days = len(forecasts)
+    end = first_day + number_days
+    observed = {field: weather_data.get_column(
+                    column, weather_data.size())[first_day:end]
+                for field, column in OBSERVED_FIELDS.items()}
+    observed["chance_of_rain"] = [
+        100 if rain >= RAIN_THRESHOLD else 0
+        for rain in weather_data.get_column(
+            "rain", weather_data.size())[first_day:end]]
+
+    errors = {}
+    for field in forecasts[0]._fields:
+        predicted = [getattr(forecast, field) for forecast in forecasts]
+        differences = [prediction - actual for prediction, actual
+                       in zip(predicted, observed[field])]
+        errors[field] = (sum(map(abs, differences)) / number_days,
+                         sqrt(sum(difference * difference
+                                  for difference in differences)
+                              / number_days))
+    return errors
+
+
+def evaluate(weather_data, make_model, first_day=1):
+    """Scores a prediction model over the whole of some weather data.
+
+    Parameters:
+        weather_data (WeatherData): Collection of weather data.
+        make_model (function): Creates a WeatherPrediction from weather data.
+        first_day (int): Position of the first day to forecast.
+
+    Return:
+        (dict<str, tuple<float, float>>) Mean absolute error and root mean
+            square error of each Forecast field, as returned by score.
+    """
+    return score(weather_data,
+                 backtest(weather_data, make_model, first_day), first_day)
+
+
+def fit_ensemble_weights(weather_data, n_days=DEFAULT_N_DAYS,
+                         members=EnsemblePrediction.DEFAULT_MEMBERS,
+                         first_day=1):
+    """Weights models for an EnsemblePrediction by their past errors.
+
+    Each field of each model is weighted by the inverse of its mean square
+    error over the weather data, so that the weights of a field sum to one.
+
+    Parameters:
+        weather_data (WeatherData): Collection of weather data.
+        n_days (int): Number of days used by each model.
+        members (list[str]): Names of models in EnsemblePrediction.MODEL_TYPES.
+        first_day (int): Position of the first day to forecast.
+
+    Return:
+        (EnsembleWeights) Weight of each model in each Forecast field.
+    """
+    errors = [evaluate(weather_data,
+                       partial(EnsemblePrediction.make_member, name,
+                               n_days=n_days), first_day)
+              for name in members]
+    weights = {}
+    for field in errors[0]:
+        square_errors = [member_errors[field][1] ** 2
+                         for member_errors in errors]
+        if min(square_errors) == 0:
+            # models which were never wrong share all of the weight
+            skill = [float(error == 0) for error in square_errors]
+        else:
+            skill = [1 / error for error in square_errors]
+        total = sum(skill)
+        weights[field] = array("d", (value / total for value in skill))
+    return EnsembleWeights(tuple(members), weights)
+
+
+def main(weather_file="weather_data.csv", weights_file=None):
+    """Prints the errors of each model in MODELS over a CSV file.
+
+    Parameters:
+        weather_file (str): Name of the CSV file containing the weather data.
+        weights_file (str): Name of a file to save ensemble weights fitted
+                            to the weather data to, if any.
+    """
+    weather_data = WeatherData()
+    weather_data.load(weather_file, cache=True)
+    if weights_file is not None:
+        save_ensemble_weights(weights_file,
+                              fit_ensemble_weights(weather_data))
+    for name, make_model in MODELS:
+        print(name)
+        for field, (mean_absolute, root_mean_square) in evaluate(
+                weather_data, make_model).items():
+            print(f"    {field}: MAE {mean_absolute:.2f}, "
+                  f"RMSE {root_mean_square:.2f}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,182 @@
+"""
+    Benchmarks for the weather data and prediction classes.
+
+    Run this file to print the result of each benchmark.
+"""
+
+import csv
+import os
+import tempfile
+import timeit
+import tracemalloc
+from array import array
+from itertools import repeat
+
+import weather_store
+from weather_data import (WeatherData, WeatherDataItem, ColumnarWeatherData,
+                          CompactWeatherDataItem, FIELDS, WIND_DIRECTIONS)
+
+# Number of days of data used by each benchmark.
+NUMBER_DAYS = 100000
+
+# Field values of one day, in WeatherDataItem constructor order.
+SAMPLE_DAY = (1.4, 31.4, 21.5, 6.7, 63, 9, 30, "ESE", 8, 1015.0)
+
+
+def item_memory(item_type, number_days=NUMBER_DAYS):
+    """Measures the memory used to hold days of weather data.
+
+    Parameters:
+        item_type (type): WeatherDataItem or CompactWeatherDataItem.
+        number_days (int): Number of days of data to create.
+
+    Return:
+        (float) Bytes allocated per day.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [item_type(*SAMPLE_DAY) for _ in range(number_days)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return (after - before) / number_days
+
+
+def column_memory(number_days=NUMBER_DAYS):
+    """Measures the memory used to hold days of weather data as columns,
+    as ColumnarWeatherData does.
+
+    Parameters:
+        number_days (int): Number of days of data to create.
+
+    Return:
+        (float) Bytes allocated per day.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    # wind directions are stored as their index in WIND_DIRECTIONS
+    columns = [array(typecode, repeat(WIND_DIRECTIONS.index(value)
+                                      if field == "wind_direction" else value,
+                                      number_days))
+               for (field, _, _, typecode), value in zip(FIELDS, SAMPLE_DAY)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del columns
+    return (after - before) / number_days
+
+
+def item_access(item_type, number_days=NUMBER_DAYS):
+    """Measures the time taken to average a field over days of weather data.
+
+    Parameters:
+        item_type (type): WeatherDataItem or CompactWeatherDataItem.
+        number_days (int): Number of days of data to average.
+
+    Return:
+        (float) Seconds taken per day.
+    """
+    items = [item_type(*SAMPLE_DAY) for _ in range(number_days)]
+    seconds = min(timeit.repeat(
+        lambda: sum(item.get_humidity() for item in items) / number_days,
+        number=1, repeat=5))
+    return seconds / number_days
+
+
+def compare_items():
+    """Prints the memory and access time of each day record type, and the
+    memory of the columns of ColumnarWeatherData."""
+    for item_type in (WeatherDataItem, CompactWeatherDataItem):
+        print(f"{item_type.__name__}: "
+              f"{item_memory(item_type):.0f} bytes/day, "
+              f"{item_access(item_type) * 1e9:.0f} ns/day to average")
+    print(f"ColumnarWeatherData: {column_memory():.0f} bytes/day")
+
+
+def write_large_file(number_days=NUMBER_DAYS,
+                     source="thoroughData/weather_data.csv"):
+    """Writes a weather data CSV file by repeating the rows of another.
+
+    Parameters:
+        number_days (int): Number of rows to write.
+        source (str): Name of the CSV file whose rows are repeated.
+
+    Return:
+        (str) Name of the temporary file written; the caller removes it.
+    """
+    with open(source) as source_file:
+        header, *rows = source_file.read().splitlines()
+    handle, weather_file = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(handle, "w") as weather_details:
+        weather_details.write(header + "\n")
+        for day in range(number_days):
+            weather_details.write(rows[day % len(rows)] + "\n")
+    return weather_file
+
+
+def dict_reader_load(weather_file):
+    """Loads weather data the way WeatherData.load did with csv.DictReader.
+
+    Parameters:
+        weather_file (str): Name of the CSV file containing the weather data.
+
+    Return:
+        [WeatherDataItem] Item for each row of the file.
+    """
+    weather_data = []
+    with open(weather_file) as weather_details:
+        for row in csv.DictReader(weather_details):
+            weather_data.append(
+                WeatherDataItem(float(row["Rainfall (mm)"]),
+                                float(row["Maximum Temperature (C)"]),
+                                float(row["Minimum Temperature (C)"]),
+                                float(row["Sunshine (hours)"]),
+                                int(row["Relative Humidity (%)"]),
+                                int(row["Wind Speed (km/h)"]),
+                                int(row["Maximum Wind Gust (km/h)"]),
+                                row["Wind Direction"],
+                                int(row["Cloud Cover (oktas)"]),
+                                float(row["MSL Pressure (hPa)"])))
+    return weather_data
+
+
+def compare_loading():
+    """Prints the rows per second loaded by each way of reading a CSV file,
+    and how many times faster than csv.DictReader each way is.
+
+    Parsing text is about 1.3 to 1.8 times as fast as csv.DictReader; only
+    loading from the binary sidecar is more than three times as fast.
+    """
+    weather_file = write_large_file()
+    try:
+        loaders = (("csv.DictReader", dict_reader_load),
+                   ("WeatherData",
+                    lambda name: WeatherData().load(name, cache=False)),
+                   ("WeatherData(compact=True)",
+                    lambda name: WeatherData(compact=True).load(name,
+                                                                cache=False)),
+                   ("ColumnarWeatherData",
+                    lambda name: ColumnarWeatherData().load(name, cache=False)),
+                   ("WeatherData from sidecar",
+                    lambda name: WeatherData().load(name, cache=True)),
+                   ("ColumnarWeatherData from sidecar",
+                    lambda name: ColumnarWeatherData().load(name, cache=True)))
+        baseline = None
+        for name, loader in loaders:
+            seconds = min(timeit.repeat(lambda: loader(weather_file),
+                                        number=1, repeat=3))
+            baseline = baseline or seconds
+            print(f"{name}: {NUMBER_DAYS / seconds:,.0f} rows/s "
+                  f"({baseline / seconds:.2f}x)")
+    finally:
+        os.remove(weather_file)
+        os.remove(weather_store.sidecar_path(weather_file))
+
+
+def main():
+    """Runs each benchmark."""
+    compare_items()
+    compare_loading()
+
+
+if __name__ == "__main__":
+    main()
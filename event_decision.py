@@ -4,6 +4,7 @@
 
     Event: Represents details about an event that may be influenced by weather.
     EventDecider: Determines if predicted weather will impact on a planned event.
+    batch_advisability: Advisability of many events under one forecast.
     UserInteraction: Simple textual interface to drive program.
 """
 
@@ -13,7 +14,7 @@ __email__ = "r.roth@uqconnect.edu.au"
 # Weather data from weater_data.py
 from weather_data import WeatherData
 # Prediction methods including Yesterday's Weather, Simple Weather Prediction and Sophisticated Weather Prediction; all subclasses of Weather Prediction super
-from prediction import WeatherPrediction, YesterdaysWeather, SimplePrediction, SophisticatedPrediction
+from prediction import WeatherPrediction, YesterdaysWeather, SimplePrediction, SophisticatedPrediction, ForecastCache
 
 class Event(object):
     """Holds data about a single event and provides access to that data."""
@@ -82,13 +83,14 @@ class EventDecision(object):
         time = self._event.get_time()
         outdoors = self._event.get_outdoors()
         cover_available = self._event.get_cover_available()
-        high_temperature = self._prediction_model.high_temperature()
-        low_temperature = self._prediction_model.low_temperature()
+        forecast = self._prediction_model.forecast()
+        high_temperature = forecast.high_temperature
+        low_temperature = forecast.low_temperature
         adjusted_high_temperature = high_temperature
         adjusted_low_temperature = low_temperature
-        wind_speed = self._prediction_model.wind_speed()
-        cloud_cover = self._prediction_model.cloud_cover()
-        humidity = self._prediction_model.humidity()
+        wind_speed = forecast.wind_speed
+        cloud_cover = forecast.cloud_cover
+        humidity = forecast.humidity
         # rule 1: Adjusts initial temperature based on a humidity factor
         if humidity > 70:
             humidity_factor = humidity/20
@@ -142,10 +144,11 @@ class EventDecision(object):
         Return:
             (float) Rain Factor
         """
-        chance_of_rain = self._prediction_model.chance_of_rain()
+        forecast = self._prediction_model.forecast()
+        chance_of_rain = forecast.chance_of_rain
         outdoors = self._event.get_outdoors()
         cover_available = self._event.get_cover_available()
-        wind_speed = self._prediction_model.wind_speed()
+        wind_speed = forecast.wind_speed
         rain_factor = 0
         # calculate initial rain factor
         # rule 1a: if COR less than 20%; use formula COR / -5 + 4
@@ -187,6 +190,49 @@ class EventDecision(object):
         return final_temperature_factor
 
 
+def batch_advisability(times, outdoors, cover_available, prediction_model):
+    """Determines how advisable each of many events is under one forecast.
+
+    With the forecast fixed, an event's advisability depends only on its
+    time and whether it is outdoors and has cover. Every combination of the
+    hours 0 to 23 is found once by EventDecision, and each event looks its
+    result up; events with any other time or details are decided by
+    EventDecision on their own. Results are therefore identical to those of
+    EventDecision.advisability.
+
+    Parameters:
+        times (list[int]): Time of each event.
+        outdoors (list[bool]): Whether each event is outdoors.
+        cover_available (list[bool]): Whether each event has cover.
+        prediction_model (WeatherPrediction): Model predicting the weather
+                                              for every event.
+
+    Pre-condition:
+        len(times) == len(outdoors) == len(cover_available)
+
+    Return:
+        (list[float]) Advisability of each event, as returned by
+                      EventDecision.advisability.
+    """
+    advisabilities = {}
+    for time in range(24):
+        for is_outdoors in (False, True):
+            for has_cover in (False, True):
+                event = Event("", is_outdoors, has_cover, time)
+                advisabilities[(time, is_outdoors, has_cover)] = EventDecision(
+                    event, prediction_model).advisability()
+    results = list(map(advisabilities.get,
+                       zip(times, outdoors, cover_available)))
+    if None in results:
+        for position, result in enumerate(results):
+            if result is None:
+                event = Event("", outdoors[position],
+                              cover_available[position], times[position])
+                results[position] = EventDecision(
+                    event, prediction_model).advisability()
+    return results
+
+
 class UserInteraction(object):
     """Simple textual interface to drive program."""
 
@@ -225,6 +271,8 @@ class UserInteraction(object):
         self._event = None
         self._prediction_model = None
         self._n_days = None
+        # models already made, reused when the same one is chosen again
+        self._models = ForecastCache()
 
     def get_event_details(self):
         """Prompt the user to enter details for an event.
@@ -350,17 +398,18 @@ class UserInteraction(object):
         print()
         # raises index error if incorrect choice
         if responses["prediction model"].casefold() == "yesterday's weather.":
-            self._prediction_model = YesterdaysWeather(weather_data)
+            self._prediction_model = self._models.model(YesterdaysWeather,
+                                                        weather_data)
         elif responses["prediction model"].casefold() == "simple prediction.":
             print(self.N_DAYS_QUESTION, end=" ")
             self._n_days = int(input())
-            self._prediction_model = SimplePrediction(
-                weather_data, self._n_days)
+            self._prediction_model = self._models.model(
+                SimplePrediction, weather_data, self._n_days)
         elif responses["prediction model"].casefold() == "sophisticated prediction.":
             print(self.N_DAYS_QUESTION, end=" ")
             self._n_days = int(input())
-            self._prediction_model = SophisticatedPrediction(
-                weather_data, self._n_days)
+            self._prediction_model = self._models.model(
+                SophisticatedPrediction, weather_data, self._n_days)
         else:
             raise IndexError(f"Error: Incorrect response. Try again.")
         return self._prediction_model
@@ -399,7 +448,7 @@ def main():
     """Main application's starting point."""
     check_again = True
     weather_data = WeatherData()
-    weather_data.load("weather_data.csv")
+    weather_data.load("weather_data.csv", cache=True)
     user_interface = UserInteraction()
 
     print("Let's determine how suitable your event is for the predicted weather.")
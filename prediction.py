@@ -3,13 +3,258 @@
 
     WeatherPrediction: Defines the super class for all weather prediction models.
     YesterdaysWeather: Predict weather to be similar to yesterday's weather.
+    Forecast: Every field predicted by a model.
+    OnlineSimplePrediction: SimplePrediction updated as each new day arrives.
+    ExponentialSmoothingPrediction: Predict weather from exponentially
+                                    weighted averages of past days.
+    RegressionPrediction: Predict weather by linear regression on past days.
+    AnalogPrediction: Predict weather to follow as it did after similar days.
+    EnsemblePrediction: Predict weather as a weighted average of the
+                        forecasts of other models.
+    EnsembleWeights: Weights of the models combined by EnsemblePrediction.
+    load_model: Loads a model saved by WeatherPrediction.save.
+    ForecastCache: Models of weather data kept to reuse their forecasts.
 """
 
 __author__ = "Richard Roth"
 __email__ = "r.roth@uqconnect.edu.au"
 
+import random
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from copy import copy
+from itertools import accumulate, repeat
+from math import ceil, cos, pi, sin
+from operator import add, mul, sub
+from weakref import WeakKeyDictionary
+
 # weather data imported from weather_data.py
-from weather_data import WeatherData
+from weather_data import (WeatherData, WeatherDataItem, FIELDS, GETTERS,
+                          WIND_DIRECTIONS)
+from weather_index import KDTree, from_tenths, tenths
+from weather_store import read_arrays, read_columns, write_arrays, write_columns
+
+# Every field predicted by a WeatherPrediction, as returned by forecast().
+Forecast = namedtuple("Forecast", ("chance_of_rain", "high_temperature",
+                                   "low_temperature", "humidity",
+                                   "cloud_cover", "wind_speed"))
+
+# Forecast field predicting each weather data field, for forecast_quantiles.
+# No model predicts an amount of rain, so it is centred on the window's mean.
+QUANTILE_FIELDS = {"rain": None,
+                   "temperature_high": "high_temperature",
+                   "temperature_low": "low_temperature",
+                   "humidity": "humidity",
+                   "cloud_cover": "cloud_cover",
+                   "wind_speed_average": "wind_speed"}
+
+# Getter of each field of weather data.
+_FIELD_GETTERS = {field: getter for getter, field in GETTERS.items()}
+
+# Typecode of the array storing each field of weather data.
+_TYPECODES = {field: typecode for field, _, _, typecode in FIELDS}
+
+# Key of files of model state written by WeatherPrediction.save.
+_MODEL_STATE_KEY = "WeatherPrediction"
+
+# Days drawn by forecast_quantiles with a seed, by the seed, number of days,
+# number of resamples and block size, least recently used first.
+_RESAMPLE_DRAWS = OrderedDict()
+_MAX_RESAMPLE_DRAWS = 8
+
+
+def _resample_draws(seed, number_days, resamples, block_size):
+    """Draws the days making up each resample of forecast_quantiles.
+
+    The days drawn for a seed are kept, so models forecasting with the same
+    seed and settings, e.g. every day of a backtest, only draw them once.
+
+    Parameters:
+        seed (int): Seed for the random draws, or None for any.
+        number_days (int): Number of days resampled.
+        resamples (int): Number of resamples.
+        block_size (int): Number of consecutive days in each block.
+
+    Return:
+        (tuple<array, array>) First day of each block, with the blocks of
+            each resample in turn, and the day added to each resample.
+    """
+    key = (seed, number_days, resamples, block_size)
+    draws = _RESAMPLE_DRAWS.get(key) if seed is not None else None
+    if draws is not None:
+        _RESAMPLE_DRAWS.move_to_end(key)
+        return draws
+    generator = random.Random(seed)
+    blocks = ceil(number_days / block_size)
+    draws = (array("i", generator.choices(
+                 range(number_days - block_size + 1), k=resamples * blocks)),
+             array("i", generator.choices(range(number_days), k=resamples)))
+    if seed is not None:
+        _RESAMPLE_DRAWS[key] = draws
+        if len(_RESAMPLE_DRAWS) > _MAX_RESAMPLE_DRAWS:
+            _RESAMPLE_DRAWS.popitem(last=False)
+    return draws
+
+
+def _resample_sums(columns, block_starts, block_size, blocks):
+    """Totals each block bootstrap resample of several columns at once.
+
+    Each day's values, in tenths, are packed into one integer with a lane
+    of bits for each column, offset so that no lane is negative. One
+    addition then totals every column exactly, so a resample costs
+    O(blocks) additions however many columns there are.
+
+    Parameters:
+        columns (list[array]): Values of each field over the days resampled.
+        block_starts (array): First day of each block, with the blocks of
+                              each resample in turn.
+        block_size (int): Number of consecutive days in each block.
+        blocks (int): Number of blocks in each resample.
+
+    Return:
+        (list[list[float]]) Total of each resample, for each column.
+    """
+    scaled = [tenths(column) for column in columns]
+    if any(type(value) is not int for column in scaled for value in column):
+        # values which are not whole numbers of tenths are totalled apart
+        sums = []
+        for column in columns:
+            totals = list(accumulate(column, initial=0))
+            block_sums = list(map(sub, totals[block_size:],
+                                  totals[:-block_size]))
+            chosen = map(block_sums.__getitem__, block_starts)
+            sums.append(list(map(sum, zip(*[chosen] * blocks))))
+        return sums
+    offsets = [-min(column) for column in scaled]
+    days_totalled = blocks * block_size
+    lane_bits = max((max(column) + offset) * days_totalled
+                    for column, offset in zip(scaled, offsets)).bit_length() + 1
+    packed = [sum((value + offset) << (lane_bits * lane)
+                  for lane, (value, offset)
+                  in enumerate(zip(day_values, offsets)))
+              for day_values in zip(*scaled)]
+    totals = list(accumulate(packed, initial=0))
+    block_sums = list(map(sub, totals[block_size:], totals[:-block_size]))
+    chosen = map(block_sums.__getitem__, block_starts)
+    # consecutive groups of blocks, each a resample of the days
+    resample_sums = list(map(sum, zip(*[chosen] * blocks)))
+    mask = (1 << lane_bits) - 1
+    return [[(((total >> (lane_bits * lane)) & mask) - offset * days_totalled)
+             / 10 for total in resample_sums]
+            for lane, offset in enumerate(offsets)]
+
+
+def _window_tenths(mean, number_days):
+    """Finds the exact total, in tenths, of a window of weather data from
+    its mean, as found by the data's own totals.
+
+    Parameters:
+        mean (float): Mean of a field over the window.
+        number_days (int): Number of days in the window.
+
+    Return:
+        (int or Fraction) Total of the window in tenths, which is exact
+                          when the total was a whole number of tenths.
+    """
+    total = round(mean * number_days * 10)
+    if from_tenths(total) / number_days == mean:
+        return total
+    return tenths([mean])[0] * number_days
+
+
+class _PredictedWeatherData(object):
+    """Weather data followed by days predicted from it, used to forecast
+    more than one day ahead.
+
+    Windows are found from the weather data's own indexes and running totals
+    of the predicted days, so nothing is copied or rescanned.
+    """
+
+    def __init__(self, weather_data):
+        """
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+        """
+        self._weather_data = weather_data
+        self._days = []
+        # running totals, in tenths, of each numeric field over the
+        # predicted days, kept exactly as the weather data's own totals are
+        self._totals = {field: [0] for field in GETTERS.values()
+                        if field != "wind_direction"}
+
+    def append(self, weather_data_item):
+        """Adds a predicted day after the last day.
+
+        Parameters:
+            weather_data_item (WeatherDataItem): Weather predicted for the day.
+        """
+        self._days.append(weather_data_item)
+        for field, totals in self._totals.items():
+            value = getattr(weather_data_item, _FIELD_GETTERS[field])()
+            totals.append(totals[-1] + tenths([value])[0])
+
+    def size(self):
+        """(int) Number of days of weather data and predicted days."""
+        return self._weather_data.size() + len(self._days)
+
+    def snapshot(self):
+        """(_PredictedWeatherData) The data itself, which is only extended
+        by forecast_horizons once the models made from it are finished with."""
+        return self
+
+    def _split(self, number_days):
+        """(tuple<int, int>) Number of days of weather data, and of predicted
+        days, in the most recent number_days."""
+        predicted = min(number_days, len(self._days))
+        return number_days - predicted, predicted
+
+    def _predicted(self, field, predicted):
+        """(list) Values of a field on the last predicted days, as stored in
+        weather data columns."""
+        values = [getattr(day, _FIELD_GETTERS[field])()
+                  for day in self._days[len(self._days) - predicted:]]
+        if field == "wind_direction":
+            values = [WIND_DIRECTIONS.index(value) for value in values]
+        return values
+
+    def get_data(self, number_days):
+        """(list) The most recent number_days days, oldest first."""
+        real, predicted = self._split(number_days)
+        days = list(self._weather_data.get_data(real)) if real else []
+        return days + self._days[len(self._days) - predicted:]
+
+    def get_column(self, field, number_days):
+        """(list) One field of the most recent number_days days, oldest first."""
+        real, predicted = self._split(number_days)
+        values = list(self._weather_data.get_column(field, real)) if real else []
+        return values + self._predicted(field, predicted)
+
+    def window_mean(self, field, number_days):
+        """(float) Mean of one field over the most recent number_days days."""
+        real, predicted = self._split(number_days)
+        total = (_window_tenths(self._weather_data.window_mean(field, real),
+                                real)
+                 if real else 0)
+        totals = self._totals[field]
+        return (from_tenths(total + totals[-1] - totals[-1 - predicted])
+                / number_days)
+
+    def window_max(self, field, number_days):
+        """Maximum of one field over the most recent number_days days."""
+        real, predicted = self._split(number_days)
+        values = self._predicted(field, predicted)
+        if real:
+            values.append(self._weather_data.window_max(field, real))
+        return max(values)
+
+    def window_min(self, field, number_days):
+        """Minimum of one field over the most recent number_days days."""
+        real, predicted = self._split(number_days)
+        values = self._predicted(field, predicted)
+        if real:
+            values.append(self._weather_data.window_min(field, real))
+        return min(values)
+
 
 class WeatherPrediction(object):
     """Superclass for all of the different weather prediction models."""
@@ -22,12 +267,200 @@ class WeatherPrediction(object):
         Pre-condition:
             weather_data.size() > 0
         """
-        self._weather_data = weather_data
+        # the data as it is now, so the model forecasts, and is saved, the
+        # same however the data changes later
+        self._weather_data = weather_data.snapshot()
+        self._forecast = None
 
     def get_number_days(self):
         """(int) Number of days of data being used in prediction"""
         raise NotImplementedError
 
+    def forecast(self):
+        """Predicts every field at once.
+
+        The fields are found the first time this is called, and the same
+        Forecast is returned by later calls.
+
+        Return:
+            (Forecast) Expected chance of rain, high and low temperature,
+                       humidity, cloud cover and wind speed.
+        """
+        if self._forecast is None:
+            self._forecast = Forecast(self.chance_of_rain(),
+                                      self.high_temperature(),
+                                      self.low_temperature(),
+                                      self.humidity(),
+                                      self.cloud_cover(),
+                                      self.wind_speed())
+        return self._forecast
+
+    def forecast_horizons(self, number_days):
+        """Predicts every field for each of the next number_days days.
+
+        Each day is predicted as if the days before it had the weather
+        forecast for them. Fields which are not forecast are taken to be
+        their average over the model's days, and the wind to keep its
+        direction.
+
+        Parameters:
+            number_days (int): Number of days ahead to forecast.
+
+        Return:
+            (list[Forecast]) Forecast of tomorrow, the day after, and so on.
+        """
+        predicted_data = _PredictedWeatherData(self._weather_data)
+        model = self
+        forecasts = []
+        for _ in range(number_days):
+            forecast = model.forecast()
+            forecasts.append(forecast)
+            if len(forecasts) < number_days:
+                predicted_data.append(model._predicted_day(forecast))
+                model = model._rolled(predicted_data)
+        return forecasts
+
+    def _predicted_day(self, forecast):
+        """Makes a day with the weather forecast to follow the model's days.
+
+        Parameters:
+            forecast (Forecast): Weather forecast for the next day.
+
+        Return:
+            (WeatherDataItem) The forecast weather.
+        """
+        return WeatherDataItem(self._window_average("rain"),
+                               forecast.high_temperature,
+                               forecast.low_temperature,
+                               self._window_average("sunshine_hours"),
+                               forecast.humidity, forecast.wind_speed,
+                               round(self._window_average("wind_speed_max")),
+                               self._wind_direction(), forecast.cloud_cover,
+                               self._window_average("air_pressure"))
+
+    def _window_average(self, field):
+        """(float) Mean of a numeric field over the days the model uses."""
+        number_days = min(self.get_number_days(), self._weather_data.size())
+        return self._weather_data.window_mean(field, number_days)
+
+    def _wind_direction(self):
+        """(str) Wind direction of the most recent day the model knows of."""
+        return self._weather_data.get_data(1)[0].get_wind_direction()
+
+    def _rolled(self, weather_data):
+        """Makes the same kind of model over longer weather data.
+
+        Parameters:
+            weather_data (_PredictedWeatherData): This model's weather data,
+                                                  with one more predicted day.
+
+        Return:
+            (WeatherPrediction) Model predicting the day after weather_data.
+        """
+        return type(self)(weather_data, self.get_number_days())
+
+    def forecast_quantiles(self, quantiles=(0.1, 0.5, 0.9), resamples=2000,
+                           block_size=3, seed=None):
+        """Estimates the distribution of each predicted field by resampling.
+
+        Each sample is the forecast, moved by the difference between the
+        mean of a block bootstrap resample of the n days and their actual
+        mean, plus the difference of a random one of the days from the mean.
+        Resampling blocks of consecutive days keeps the correlation between
+        neighbouring days, and every field is resampled from the same days.
+        The days drawn with a seed are kept, so calls with the same seed and
+        settings only find each field's resample sums.
+
+        Drawing the days costs O(resamples * n / block_size), as each
+        resample is n / block_size blocks, so a year of days takes about ten
+        times as long as a month. Every field is totalled at once from prefix
+        sums in integer arithmetic, at O(n / block_size) per resample.
+
+        Parameters:
+            quantiles (list[float]): Proportions, between 0 and 1, of samples
+                                     at or below each value to find.
+            resamples (int): Number of samples drawn.
+            block_size (int): Number of consecutive days in each block.
+            seed (int): Seed for the random samples, or None for any.
+
+        Return:
+            (dict<str, list[float]>) Value at each quantile for each field in
+                                     QUANTILE_FIELDS.
+        """
+        forecast = self.forecast()
+        number_days = min(self.get_number_days(), self._weather_data.size())
+        block_size = min(block_size, number_days)
+        blocks = ceil(number_days / block_size)
+        # first day of each block, and the day added, of every sample
+        block_starts, sample_days = _resample_draws(seed, number_days,
+                                                    resamples, block_size)
+        positions = [min(int(quantile * resamples), resamples - 1)
+                     for quantile in quantiles]
+        scale = 1 / (blocks * block_size)
+        columns = [self._weather_data.get_column(field, number_days)
+                   for field in QUANTILE_FIELDS]
+        distributions = {}
+        for (field, forecast_field), days, resample_sums in zip(
+                QUANTILE_FIELDS.items(), columns,
+                _resample_sums(columns, block_starts, block_size, blocks)):
+            mean = sum(days) / number_days
+            centre = (mean if forecast_field is None
+                      else getattr(forecast, forecast_field))
+            # the centre less twice the mean is added once sorted
+            samples = sorted(map(add, map(mul, resample_sums, repeat(scale)),
+                                 map(days.__getitem__, sample_days)))
+            offset = centre - 2 * mean
+            distributions[field] = [
+                samples[position] + offset
+                if field in ("temperature_high", "temperature_low")
+                # amounts which cannot be negative
+                else max(samples[position] + offset, 0)
+                for position in positions]
+        return distributions
+
+    def save(self, path):
+        """Saves the state the model forecasts from to a binary file.
+
+        The model loaded by load_model forecasts the same weather without
+        the weather data, and models which can be pushed new days still can.
+
+        Parameters:
+            path (str): Name of the file to write.
+        """
+        state = self._state()
+        state["type"] = type(self).__name__
+        strings = []
+        for name, value in state.items():
+            if isinstance(value, str):
+                strings.extend((name, value))
+        write_arrays(path, {name: value for name, value in state.items()
+                            if not isinstance(value, str)},
+                     strings, _MODEL_STATE_KEY)
+
+    def _state(self):
+        """Finds the state saved by save.
+
+        By default this is the window statistics the model's rules use,
+        found by making the model again over a recording of the snapshot of
+        its data, so days added to the data since are not saved.
+
+        Return:
+            (dict<str, array or str>) Each part of the state, by name.
+        """
+        window = _SharedWindow(self._weather_data)
+        self._rolled(window).forecast()
+        state = window.state()
+        state["number_days"] = array("q", [self.get_number_days()])
+        return state
+
+    def _restore(self, state):
+        """Sets up a model, made without calling __init__, from its state.
+
+        Parameters:
+            state (dict<str, array or str>): State returned by _state.
+        """
+        self.__init__(_SharedWindow.restored(state), state["number_days"][0])
+
     def chance_of_rain(self):
         """(int) Percentage indicating chance of rain occurring."""
         raise NotImplementedError
@@ -65,13 +498,21 @@ class YesterdaysWeather(WeatherPrediction):
             weather_data.size() > 0
         """
         super().__init__(weather_data)
-        self._yesterdays_weather = self._weather_data.get_data(1)
+        self._yesterdays_weather = weather_data.get_data(1)
         self._yesterdays_weather = self._yesterdays_weather[0]
 
     def get_number_days(self):
         """(int) Number of days of data being used in prediction"""
         return 1
 
+    def _rolled(self, weather_data):
+        """(YesterdaysWeather) Model predicting the day after weather_data."""
+        return YesterdaysWeather(weather_data)
+
+    def _restore(self, state):
+        """Sets up the model from the state returned by _state."""
+        self.__init__(_SharedWindow.restored(state))
+
     def chance_of_rain(self):
         """(int) Percentage indicating chance of rain occurring."""
         # Amount of yesterday's rain indicating chance of it occurring.
@@ -120,6 +561,9 @@ class SimplePrediction(WeatherPrediction):
     """Simple prediction model that predicts weather based on the average of the past n days' worth of data, where n is a parameter.
     """
 
+    # Fields averaged over the n days by the prediction rules.
+    AVERAGED_FIELDS = ("rain", "humidity", "cloud_cover", "wind_speed_average")
+
     def __init__(self, weather_data, n_days):
         """
         Parameters:
@@ -130,16 +574,62 @@ class SimplePrediction(WeatherPrediction):
             weather_data.size() > 0
         """
         super().__init__(weather_data)
+        self._window_days = n_days
         if n_days > weather_data.size():
             n_days = weather_data.size()
-        self._simple_prediction = self._weather_data.get_data(n_days)
-        self._yesterday_value = self._simple_prediction[0]
         self._number_days = n_days
+        # every window statistic used by the rules, found once from the data
+        # so the predictions do not change as days are added to it
+        self._averages = {field: weather_data.window_mean(field, n_days)
+                          for field in self.AVERAGED_FIELDS}
+        self._high_temperature = weather_data.window_max("temperature_high",
+                                                         n_days)
+        self._low_temperature = weather_data.window_min("temperature_low",
+                                                        n_days)
 
     def get_number_days(self):
         """(int) Returns number of days of data being used"""
         return self._number_days
 
+    def forecast_each_day(self, weather_data, first_day):
+        """Forecasts each day of weather data from first_day on, as a model
+        with the same number of days made from the days before it would.
+
+        The rules are applied to window statistics found for every day at
+        once by rolling_mean, rolling_max and rolling_min, rather than a
+        model, and its queries, being made for each day.
+
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+            first_day (int): Position of the first day to forecast.
+
+        Pre-condition:
+            0 < first_day
+
+        Return:
+            (list[Forecast]) Forecast of each day from first_day onwards.
+        """
+        n_days = self._window_days
+        averages = {field: weather_data.rolling_mean(field, n_days)
+                    for field in self.AVERAGED_FIELDS}
+        highs = weather_data.rolling_max("temperature_high", n_days)
+        lows = weather_data.rolling_min("temperature_low", n_days)
+        # the rules of SimplePrediction itself, which OnlineSimplePrediction
+        # keeps but answers from its own running totals
+        model = SimplePrediction.__new__(SimplePrediction)
+        model._weather_data = None
+        forecasts = []
+        # each day is forecast from the window ending the day before it
+        for day in range(first_day - 1, weather_data.size() - 1):
+            model._forecast = None
+            model._number_days = min(n_days, day + 1)
+            model._averages = {field: means[day]
+                               for field, means in averages.items()}
+            model._high_temperature = highs[day]
+            model._low_temperature = lows[day]
+            forecasts.append(model.forecast())
+        return forecasts
+
     def calculate_average(self, data):
         """
         Calculate the average value from the data
@@ -150,11 +640,12 @@ class SimplePrediction(WeatherPrediction):
         Return:
             (float) average
         """
-        running_average = 0
-        for row in self._simple_prediction:
-            running_average += getattr(row, data)()
-        total_average = running_average/self._number_days
-        return total_average
+        field = GETTERS[data]
+        # averages used by the rules were found when the model was created
+        if field not in self._averages:
+            self._averages[field] = self._weather_data.window_mean(
+                field, self._number_days)
+        return self._averages[field]
 
     def chance_of_rain(self):
         """(int) Calculates the average rainfall for the past n days"""
@@ -167,27 +658,11 @@ class SimplePrediction(WeatherPrediction):
 
     def high_temperature(self):
         """(float) Returns the highest temperature in n days"""
-        max_temperature = self._yesterday_value.get_high_temperature()
-        n = 0
-        # for each row in weather data find high temperature and compare it to max temperature
-        for row in self._simple_prediction:
-            if self._simple_prediction[n].get_high_temperature() > max_temperature:
-                max_temperature = self._simple_prediction[n].get_high_temperature(
-                )
-            n += 1
-        return max_temperature
+        return self._high_temperature
 
     def low_temperature(self):
         """(float) Returns the lowest temperature in n days"""
-        min_temperature = self._yesterday_value.get_low_temperature()
-        n = 0
-        # for each row in weather data find low temperature and compare it with min temperature
-        for row in self._simple_prediction:
-            if self._simple_prediction[n].get_low_temperature() < min_temperature:
-                min_temperature = self._simple_prediction[n].get_low_temperature(
-                )
-            n += 1
-        return min_temperature
+        return self._low_temperature
 
     def humidity(self):
         """(int) Calculates average humidity over n days"""
@@ -202,10 +677,839 @@ class SimplePrediction(WeatherPrediction):
         return round(self.calculate_average("get_average_wind_speed"))
 
 
+class OnlineSimplePrediction(SimplePrediction):
+    """SimplePrediction which is updated, rather than rebuilt, as each new
+    day of weather data arrives.
+    """
+
+    # Getter of each field averaged over the window, i.e. every number.
+    AVERAGED_GETTERS = tuple(getter for getter in GETTERS
+                             if getter != "get_wind_direction")
+
+    def __init__(self, weather_data, n_days):
+        """
+        Parameters:
+            weather_data (WeatherData): Collection of weather data up to now.
+            n_days (int): number of days worth of data
+
+        Pre-condition:
+            weather_data.size() > 0
+        """
+        super().__init__(weather_data, n_days)
+        size = weather_data.size()
+        self._window_days = n_days
+        self._days_seen = size
+        # running totals of each field over the window in tenths, kept
+        # exactly as the prefix sums of the data are so averages match
+        # SimplePrediction's
+        self._totals = {}
+        for getter in self.AVERAGED_GETTERS:
+            column = weather_data.get_column(GETTERS[getter],
+                                             self._number_days)
+            self._totals[getter] = deque(accumulate(tenths(column), initial=0),
+                                         maxlen=n_days + 1)
+        self._latest_wind_direction = (
+            weather_data.get_data(1)[0].get_wind_direction())
+        # (day, temperature) pairs, hottest first for highs and coldest first
+        # for lows, of each day in the window that could still be the extreme
+        self._highs = deque()
+        self._lows = deque()
+        first_day = size - self._number_days
+        for day, item in enumerate(weather_data.get_data(self._number_days),
+                                   start=first_day):
+            self._add_extremes(day, item)
+
+    def push(self, weather_data_item):
+        """Adds the weather of a new day, moving the window on by one day.
+
+        Parameters:
+            weather_data_item (WeatherDataItem): Weather of the day after
+                                                 the most recent day so far.
+        """
+        for getter in self.AVERAGED_GETTERS:
+            totals = self._totals[getter]
+            value = getattr(weather_data_item, getter)()
+            totals.append(totals[-1] + tenths([value])[0])
+        self._latest_wind_direction = weather_data_item.get_wind_direction()
+        self._add_extremes(self._days_seen, weather_data_item)
+        self._days_seen += 1
+        self._number_days = min(self._window_days, self._days_seen)
+        # days which have left the window
+        first_day = self._days_seen - self._number_days
+        if self._highs[0][0] < first_day:
+            self._highs.popleft()
+        if self._lows[0][0] < first_day:
+            self._lows.popleft()
+        self._forecast = None
+
+    def _rolled(self, weather_data):
+        """(OnlineSimplePrediction) Copy of the model with the last day of
+        weather_data pushed."""
+        rolled = copy(self)
+        rolled._totals = {getter: deque(totals, maxlen=totals.maxlen)
+                          for getter, totals in self._totals.items()}
+        rolled._highs = deque(self._highs)
+        rolled._lows = deque(self._lows)
+        rolled.push(weather_data.get_data(1)[0])
+        return rolled
+
+    def _state(self):
+        """(dict<str, array or str>) Running totals, candidate extremes and
+        the most recent wind direction."""
+        state = {"number_days": array("q", [self._window_days,
+                                            self._days_seen]),
+                 "wind_direction": self._latest_wind_direction}
+        for getter, totals in self._totals.items():
+            try:
+                state[f"totals {getter}"] = array("q", totals)
+            except (OverflowError, TypeError):
+                # totals which are not whole numbers of tenths
+                state[f"totals {getter}"] = array("d", map(float, totals))
+        for name, extremes in (("highs", self._highs), ("lows", self._lows)):
+            state[f"{name} days"] = array("q", (day for day, _ in extremes))
+            state[name] = array("d", (value for _, value in extremes))
+        return state
+
+    def _restore(self, state):
+        """Sets up the model from the state returned by _state."""
+        self._weather_data = None
+        self._forecast = None
+        self._window_days, self._days_seen = state["number_days"]
+        self._number_days = min(self._window_days, self._days_seen)
+        self._latest_wind_direction = state["wind_direction"]
+        self._totals = {getter: deque(state[f"totals {getter}"],
+                                      maxlen=self._window_days + 1)
+                        for getter in self.AVERAGED_GETTERS}
+        self._highs = deque(zip(state["highs days"], state["highs"]))
+        self._lows = deque(zip(state["lows days"], state["lows"]))
+
+    def _add_extremes(self, day, weather_data_item):
+        """Adds a day's temperatures to the candidates for the extremes.
+
+        Parameters:
+            day (int): Position of the day in the weather data.
+            weather_data_item (WeatherDataItem): Weather of the day.
+        """
+        # stored as the data's columns store them, so results match exactly
+        high_temperature = float(weather_data_item.get_high_temperature())
+        low_temperature = float(weather_data_item.get_low_temperature())
+        while self._highs and self._highs[-1][1] <= high_temperature:
+            self._highs.pop()
+        self._highs.append((day, high_temperature))
+        while self._lows and self._lows[-1][1] >= low_temperature:
+            self._lows.pop()
+        self._lows.append((day, low_temperature))
+
+    def calculate_average(self, data):
+        """
+        Calculate the average value from the data
+
+        Parameters :
+            data (str): data gathered from WeatherData
+
+        Return:
+            (float) average
+        """
+        totals = self._totals[data]
+        return from_tenths(totals[-1] - totals[0]) / self._number_days
+
+    def _window_average(self, field):
+        """(float) Mean of a numeric field over the days pushed into the
+        window, which the weather data may not have."""
+        return self.calculate_average(_FIELD_GETTERS[field])
+
+    def _wind_direction(self):
+        """(str) Wind direction of the most recent day pushed."""
+        return self._latest_wind_direction
+
+    def high_temperature(self):
+        """(float) Returns the highest temperature in n days"""
+        return self._highs[0][1]
+
+    def low_temperature(self):
+        """(float) Returns the lowest temperature in n days"""
+        return self._lows[0][1]
+
+
+class ExponentialSmoothingPrediction(WeatherPrediction):
+    """Prediction model that predicts weather from exponentially weighted
+    averages, which weight each day 1 - 2 / (n + 1) times as much as the
+    day after it.
+
+    Only the current average of each field is kept, so memory use does not
+    depend on the number of days of data.
+    """
+
+    # Getter of each field averaged.
+    SMOOTHED_GETTERS = ("get_rainfall", "get_high_temperature",
+                        "get_low_temperature", "get_humidity",
+                        "get_cloud_cover", "get_average_wind_speed")
+
+    def __init__(self, weather_data, n_days):
+        """
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+            n_days (int): number of days worth of data, which the averages
+                          are centred on as a simple average of n days is
+
+        Pre-condition:
+            weather_data.size() > 0
+            n_days > 0
+        """
+        super().__init__(weather_data)
+        self._number_days = n_days
+        self._smoothing = 2 / (n_days + 1)
+        size = weather_data.size()
+        # weight of each day in the average, oldest first, found in one pass:
+        # the first day starts the average and each later one is mixed in
+        decay = 1 - self._smoothing
+        powers = array("d", accumulate(repeat(decay, size - 1), mul,
+                                       initial=1.0))
+        weights = array("d", [powers[-1]])
+        weights.extend(map(mul, repeat(self._smoothing), reversed(powers[:-1])))
+        self._averages = array("d", (
+            sum(map(mul, weights, weather_data.get_column(GETTERS[getter],
+                                                          size)))
+            for getter in self.SMOOTHED_GETTERS))
+
+    def push(self, weather_data_item):
+        """Mixes the weather of a new day into the averages.
+
+        Parameters:
+            weather_data_item (WeatherDataItem): Weather of the day after
+                                                 the most recent day so far.
+        """
+        for position, getter in enumerate(self.SMOOTHED_GETTERS):
+            value = getattr(weather_data_item, getter)()
+            self._averages[position] += (
+                self._smoothing * (value - self._averages[position]))
+        self._forecast = None
+
+    def get_number_days(self):
+        """(int) Returns number of days the averages are centred on"""
+        return self._number_days
+
+    def _rolled(self, weather_data):
+        """(ExponentialSmoothingPrediction) Copy of the model with the last
+        day of weather_data pushed."""
+        rolled = copy(self)
+        rolled._weather_data = weather_data
+        rolled._averages = array("d", self._averages)
+        rolled.push(weather_data.get_data(1)[0])
+        return rolled
+
+    def _state(self):
+        """(dict<str, array>) Number of days and the current averages."""
+        return {"number_days": array("q", [self._number_days]),
+                "averages": array("d", self._averages)}
+
+    def _restore(self, state):
+        """Sets up the model from the state returned by _state."""
+        self._weather_data = None
+        self._forecast = None
+        self._number_days = state["number_days"][0]
+        self._smoothing = 2 / (self._number_days + 1)
+        self._averages = array("d", state["averages"])
+
+    def calculate_average(self, data):
+        """
+        Returns the exponentially weighted average of a field
+
+        Parameters :
+            data (str): getter of a field in SMOOTHED_GETTERS
+
+        Return:
+            (float) average
+        """
+        return self._averages[self.SMOOTHED_GETTERS.index(data)]
+
+    def chance_of_rain(self):
+        """(int) Calculates the chance of rain from the average rainfall"""
+        chance_of_rain = self.calculate_average("get_rainfall") * 9
+        # value parameters
+        if chance_of_rain > 100:
+            chance_of_rain = 100
+        return round(chance_of_rain)
+
+    def high_temperature(self):
+        """(float) Returns the average high temperature"""
+        return self.calculate_average("get_high_temperature")
+
+    def low_temperature(self):
+        """(float) Returns the average low temperature"""
+        return self.calculate_average("get_low_temperature")
+
+    def humidity(self):
+        """(int) Calculates average humidity"""
+        return round(self.calculate_average("get_humidity"))
+
+    def cloud_cover(self):
+        """(int) Calculates average cloud cover"""
+        return round(self.calculate_average("get_cloud_cover"))
+
+    def wind_speed(self):
+        """(int) Calculates average wind speed"""
+        return round(self.calculate_average("get_average_wind_speed"))
+
+
+# Sine and cosine of the direction of each of the first 17 wind directions
+# in WIND_DIRECTIONS: no wind, then the compass points a sixteenth of a turn
+# apart. No wind, and any other direction, is encoded as zero.
+_WIND_ENCODINGS = tuple((0.0,) + tuple(angle(2 * pi * point / 16)
+                                       for point in range(16))
+                        for angle in (sin, cos))
+
+
+def _solve(matrix, right_hand_sides):
+    """Solves a system of linear equations for several right hand sides at once,
+    by Gaussian elimination with partial pivoting.
+
+    Parameters:
+        matrix (list[list[float]]): Square matrix of coefficients, which is
+                                    overwritten.
+        right_hand_sides (list[list[float]]): Row of right hand sides for
+                                              each equation, also overwritten.
+
+    Return:
+        (list[list[float]]) Row of the solutions for each unknown.
+    """
+    size = len(matrix)
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda row: abs(matrix[row][column]))
+        matrix[column], matrix[pivot] = matrix[pivot], matrix[column]
+        right_hand_sides[column], right_hand_sides[pivot] = (
+            right_hand_sides[pivot], right_hand_sides[column])
+        pivot_row = matrix[column]
+        pivot_sides = right_hand_sides[column]
+        for row in range(column + 1, size):
+            factor = matrix[row][column] / pivot_row[column]
+            if factor:
+                matrix[row] = list(map(sub, matrix[row],
+                                       map(mul, repeat(factor), pivot_row)))
+                right_hand_sides[row] = list(map(
+                    sub, right_hand_sides[row],
+                    map(mul, repeat(factor), pivot_sides)))
+    solutions = [None] * size
+    for row in reversed(range(size)):
+        sides = right_hand_sides[row]
+        for later in range(row + 1, size):
+            sides = list(map(sub, sides, map(mul, repeat(matrix[row][later]),
+                                             solutions[later])))
+        solutions[row] = [side / matrix[row][row] for side in sides]
+    return solutions
+
+
+class RegressionPrediction(WeatherPrediction):
+    """Prediction model that predicts each field by linear regression on the
+    previous n days of every field, the change in air pressure over the
+    last day and the direction of the last day's wind.
+
+    All fields are fitted together, by least squares over the whole of the
+    weather data, and the coefficients are cached for the data. New days
+    can be pushed into the fit, rather than fitting every day again.
+    """
+
+    # Fields predicted, and used from each of the previous n days.
+    REGRESSED_FIELDS = ("rain", "temperature_high", "temperature_low",
+                        "humidity", "cloud_cover", "wind_speed_average")
+
+    # Added to the diagonal of the normal equations, other than the
+    # intercept's, so they can be solved when features are collinear.
+    RIDGE = 1e-3
+
+    # (version, fit by number of days, as returned by _fit) of each weather
+    # data, where version is the data's version when it was fitted.
+    _fitted = WeakKeyDictionary()
+
+    def __init__(self, weather_data, n_days):
+        """
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+            n_days (int): number of previous days used to predict each day
+
+        Pre-condition:
+            weather_data.size() > 2
+            n_days > 0
+        """
+        super().__init__(weather_data)
+        size = weather_data.size()
+        # the change in pressure needs two previous days for every day fitted
+        n_days = min(n_days, size - 2)
+        self._number_days = n_days
+        version = weather_data.version()
+        fitted_version, fitted = self._fitted.get(weather_data, (None, None))
+        if fitted_version != version:
+            # the data has been loaded or added to since, even if its size
+            # is the same, so earlier coefficients no longer fit it
+            fitted = {}
+            self._fitted[weather_data] = (version, fitted)
+        if n_days not in fitted:
+            fitted[n_days] = self._fit(weather_data, n_days)
+        # none of these is changed in place, as pushing days replaces them
+        (self._normal_matrix, self._right_hand_sides, self._coefficients,
+         self._inverse) = fitted[n_days]
+        # days fitted, and the number when the inverse was last solved for
+        self._days_fitted = self._days_solved = size - max(n_days, 2)
+        self._set_latest(weather_data)
+
+    def _set_latest(self, weather_data):
+        """Predicts each field of the day after some weather data.
+
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+        """
+        # features of the days up to now, predicting tomorrow
+        self._next_features = [value[0] for value in self._features(
+            weather_data, self._number_days, weather_data.size())]
+        self._latest_pressure = weather_data.get_column("air_pressure", 1)[0]
+        self._predictions = [
+            sum(map(mul, field_coefficients, self._next_features))
+            for field_coefficients in self._coefficients]
+
+    def push(self, weather_data_item):
+        """Fits the weather of a new day too, then predicts the day after it.
+
+        The day is added to the least squares fit by a rank one update of
+        the inverse of its normal equations, so each day costs the square of
+        the number of features rather than a fit over every day so far.
+        Rounding errors in the updated inverse grow, most while few days are
+        fitted, so the normal equations are kept as well and solved again
+        while there are no more days fitted than features, then each time
+        the number of days fitted doubles. The number of days used
+        is the number the model was made with, even if that was fewer than
+        n_days for lack of data.
+
+        Parameters:
+            weather_data_item (WeatherDataItem): Weather of the day after
+                                                 the most recent day so far.
+        """
+        features = self._next_features
+        values = [float(getattr(weather_data_item, _FIELD_GETTERS[field])())
+                  for field in self.REGRESSED_FIELDS]
+        self._normal_matrix = [
+            list(map(add, row, map(mul, features, repeat(feature))))
+            for row, feature in zip(self._normal_matrix, features)]
+        self._right_hand_sides = [
+            list(map(add, sides, map(mul, values, repeat(feature))))
+            for sides, feature in zip(self._right_hand_sides, features)]
+        self._days_fitted += 1
+        if (self._days_fitted >= 2 * self._days_solved
+                or self._days_fitted <= len(features)):
+            self._coefficients, self._inverse = self._solved(
+                self._normal_matrix, self._right_hand_sides)
+            self._days_solved = self._days_fitted
+        else:
+            inverse_features = [sum(map(mul, row, features))
+                                for row in self._inverse]
+            gain = list(map(mul, inverse_features, repeat(
+                1 / (1 + sum(map(mul, features, inverse_features))))))
+            self._coefficients = [
+                list(map(add, field_coefficients,
+                         map(mul, gain, repeat(value - prediction))))
+                for field_coefficients, value, prediction
+                in zip(self._coefficients, values, self._predictions)]
+            self._inverse = [list(map(sub, row, map(mul, inverse_features,
+                                                    repeat(row_gain))))
+                             for row, row_gain in zip(self._inverse, gain)]
+        # each field's days move back by one, the new day becoming the first
+        next_features = [1.0]
+        lags = self._number_days
+        for position, value in enumerate(values):
+            next_features.append(value)
+            next_features.extend(
+                features[1 + position * lags:position * lags + lags])
+        pressure = float(weather_data_item.get_air_pressure())
+        next_features.append(pressure - self._latest_pressure)
+        direction = weather_data_item.get_wind_direction()
+        encoded = WIND_DIRECTIONS[:len(_WIND_ENCODINGS[0])]
+        next_features.extend(encoding[encoded.index(direction)]
+                             if direction in encoded else 0.0
+                             for encoding in _WIND_ENCODINGS)
+        self._next_features = next_features
+        self._latest_pressure = pressure
+        self._predictions = [
+            sum(map(mul, field_coefficients, next_features))
+            for field_coefficients in self._coefficients]
+        self._forecast = None
+
+    def _rolled(self, weather_data):
+        """(RegressionPrediction) Copy of the model predicting the day after
+        weather_data, with the same coefficients."""
+        rolled = copy(self)
+        rolled._weather_data = weather_data
+        rolled._forecast = None
+        rolled._set_latest(weather_data)
+        return rolled
+
+    def _state(self):
+        """(dict<str, array>) Coefficients and predictions of each field, and
+        what pushing a day needs: the normal equations and the inverse of
+        their matrix, the features predicting the next day and the latest
+        air pressure."""
+        state = {"number_days": array("q", [self._number_days]),
+                 "days_fitted": array("q", [self._days_fitted,
+                                            self._days_solved]),
+                 "predictions": array("d", self._predictions),
+                 "features": array("d", self._next_features),
+                 "air_pressure": array("d", [self._latest_pressure])}
+        for name, rows in (("normal_matrix", self._normal_matrix),
+                           ("right_hand_sides", self._right_hand_sides),
+                           ("inverse", self._inverse)):
+            state[name] = array("d", (value for row in rows for value in row))
+        for field, field_coefficients in zip(self.REGRESSED_FIELDS,
+                                             self._coefficients):
+            state[f"coefficients {field}"] = array("d", field_coefficients)
+        return state
+
+    def _restore(self, state):
+        """Sets up the model from the state returned by _state."""
+        self._weather_data = None
+        self._forecast = None
+        self._number_days = state["number_days"][0]
+        self._days_fitted, self._days_solved = state["days_fitted"]
+        self._coefficients = [list(state[f"coefficients {field}"])
+                              for field in self.REGRESSED_FIELDS]
+        self._predictions = list(state["predictions"])
+        self._next_features = list(state["features"])
+        self._latest_pressure = state["air_pressure"][0]
+        # stored a row after another
+        size = len(self._next_features)
+        fields = len(self.REGRESSED_FIELDS)
+        self._normal_matrix, self._right_hand_sides, self._inverse = (
+            [list(state[name][start:start + width])
+             for start in range(0, size * width, width)]
+            for name, width in (("normal_matrix", size),
+                                ("right_hand_sides", fields),
+                                ("inverse", size)))
+
+    @classmethod
+    def _features(cls, weather_data, n_days, first_day):
+        """Finds the features used to predict each day from first_day on.
+
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+            n_days (int): number of previous days used to predict each day
+            first_day (int): position of the first day predicted, which may
+                             be the day after the most recent day
+
+        Return:
+            (list[array]) Value of each feature for each day predicted.
+        """
+        # only the days features are taken from are retrieved, so positions
+        # below are relative to the first of them
+        start = first_day - max(n_days, 2)
+        first_day -= start
+        size = weather_data.size() - start
+        columns = {field: weather_data.get_column(field, size)
+                   for field in cls.REGRESSED_FIELDS + ("air_pressure",
+                                                        "wind_direction")}
+        features = [array("d", repeat(1.0, size + 1 - first_day))]
+        for field in cls.REGRESSED_FIELDS:
+            for lag in range(1, n_days + 1):
+                features.append(array("d", columns[field][
+                    first_day - lag:size + 1 - lag]))
+        pressures = columns["air_pressure"]
+        features.append(array("d", map(sub, pressures[first_day - 1:size],
+                                       pressures[first_day - 2:size - 1])))
+        directions = columns["wind_direction"][first_day - 1:size]
+        for encoding in _WIND_ENCODINGS:
+            features.append(array("d", (encoding[code] if code <= 16 else 0.0
+                                        for code in directions)))
+        return features
+
+    @classmethod
+    def _fit(cls, weather_data, n_days):
+        """Fits every field by least squares.
+
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+            n_days (int): number of previous days used to predict each day
+
+        Return:
+            (tuple<list[list[float]]>) Matrix and right hand sides of the
+                normal equations, the coefficient of each feature for each
+                field and the inverse of the normal matrix.
+        """
+        size = weather_data.size()
+        first_day = max(n_days, 2)
+        # the last row of features predicts tomorrow, so is not fitted
+        features = [feature[:-1] for feature in
+                    cls._features(weather_data, n_days, first_day)]
+        targets = [weather_data.get_column(field, size)[first_day:]
+                   for field in cls.REGRESSED_FIELDS]
+        # symmetric, so only the upper triangle is calculated
+        normal_matrix = [[0.0] * len(features) for _ in features]
+        for row, row_feature in enumerate(features):
+            for column in range(row, len(features)):
+                normal_matrix[row][column] = normal_matrix[column][row] = sum(
+                    map(mul, row_feature, features[column]))
+            if row:
+                normal_matrix[row][row] += cls.RIDGE
+        right_hand_sides = [[sum(map(mul, feature, target))
+                             for target in targets]
+                            for feature in features]
+        return ((normal_matrix, right_hand_sides)
+                + cls._solved(normal_matrix, right_hand_sides))
+
+    @staticmethod
+    def _solved(normal_matrix, right_hand_sides):
+        """Solves the normal equations, inverting their matrix at once.
+
+        Parameters:
+            normal_matrix (list[list[float]]): Matrix of the normal
+                                               equations, which is kept.
+            right_hand_sides (list[list[float]]): Right hand side of each
+                                                  field, for each feature.
+
+        Return:
+            (tuple<list[list[float]], list[list[float]]>) Coefficient of each
+                feature for each field, and the inverse of the normal matrix.
+        """
+        size = len(normal_matrix)
+        fields = len(right_hand_sides[0])
+        # each row followed by a row of the identity, solved for the inverse
+        solutions = _solve([list(row) for row in normal_matrix],
+                           [sides + [float(row == column)
+                                     for column in range(size)]
+                            for row, sides in enumerate(right_hand_sides)])
+        # transposed, so each field's coefficients are together
+        return ([list(field_coefficients) for field_coefficients
+                 in zip(*(solution[:fields] for solution in solutions))],
+                [solution[fields:] for solution in solutions])
+
+    def get_number_days(self):
+        """(int) Returns number of previous days used to predict"""
+        return self._number_days
+
+    def calculate_average(self, data):
+        """
+        Returns the predicted value of a field
+
+        Parameters :
+            data (str): getter of a field in REGRESSED_FIELDS
+
+        Return:
+            (float) prediction
+        """
+        return self._predictions[self.REGRESSED_FIELDS.index(GETTERS[data])]
+
+    def chance_of_rain(self):
+        """(int) Calculates the chance of rain from the predicted rainfall"""
+        chance_of_rain = self.calculate_average("get_rainfall") * 9
+        # value parameters
+        if chance_of_rain > 100:
+            chance_of_rain = 100
+        if chance_of_rain < 0:
+            chance_of_rain = 0
+        return round(chance_of_rain)
+
+    def high_temperature(self):
+        """(float) Returns the predicted high temperature"""
+        return self.calculate_average("get_high_temperature")
+
+    def low_temperature(self):
+        """(float) Returns the predicted low temperature"""
+        return self.calculate_average("get_low_temperature")
+
+    def humidity(self):
+        """(int) Calculates the predicted humidity"""
+        humidity = self.calculate_average("get_humidity")
+        # value parameters
+        if humidity > 100:
+            humidity = 100
+        if humidity < 0:
+            humidity = 0
+        return round(humidity)
+
+    def cloud_cover(self):
+        """(int) Calculates the predicted cloud cover"""
+        cloud_cover = self.calculate_average("get_cloud_cover")
+        # value parameters
+        if cloud_cover > 9:
+            cloud_cover = 9
+        if cloud_cover < 0:
+            cloud_cover = 0
+        return round(cloud_cover)
+
+    def wind_speed(self):
+        """(int) Calculates the predicted wind speed"""
+        wind_speed = self.calculate_average("get_average_wind_speed")
+        # value parameters
+        if wind_speed < 0:
+            wind_speed = 0
+        return round(wind_speed)
+
+
+class AnalogPrediction(WeatherPrediction):
+    """Prediction model that finds the n past days most like the most recent
+    day, and predicts the weather of the days that followed them.
+    """
+
+    # Fields compared to find similar days; each is divided by its standard
+    # deviation so that they count equally.
+    FEATURE_FIELDS = ("air_pressure", "humidity", "cloud_cover",
+                      "wind_speed_average")
+
+    # Fields predicted from the days following similar days.
+    PREDICTED_FIELDS = ("rain", "temperature_high", "temperature_low",
+                        "humidity", "cloud_cover", "wind_speed_average")
+
+    # Rainfall (mm) at or above which a day counts as having rained.
+    RAIN_THRESHOLD = 0.1
+
+    # (version, scales, KDTree, predicted columns) of each weather data,
+    # where version is the data's version when it was indexed.
+    _indexes = WeakKeyDictionary()
+
+    def __init__(self, weather_data, n_days):
+        """
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+            n_days (int): number of similar days to predict from
+
+        Pre-condition:
+            weather_data.size() > 1
+            n_days > 0
+        """
+        super().__init__(weather_data)
+        size = weather_data.size()
+        # only days before the most recent are followed by a known day
+        n_days = min(n_days, size - 1)
+        self._number_days = n_days
+        index = self._indexes.get(weather_data)
+        if index is None or index[0] != weather_data.version():
+            index = self._indexes[weather_data] = self._index(weather_data)
+        _, self._scales, self._tree, self._columns = index
+        self._following_days = self._similar_days(weather_data)
+
+    def _similar_days(self, weather_data):
+        """Finds the days following the days most like the most recent day.
+
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+
+        Return:
+            (list[int]) Position of each day following a similar day.
+        """
+        today = [weather_data.get_column(field, 1)[0] / scale
+                 for field, scale in zip(self.FEATURE_FIELDS, self._scales)]
+        return [day + 1 for day in self._tree.nearest(today,
+                                                      self._number_days)]
+
+    def _rolled(self, weather_data):
+        """(AnalogPrediction) Copy of the model predicting the day after
+        weather_data from the same past days."""
+        rolled = copy(self)
+        rolled._weather_data = weather_data
+        rolled._forecast = None
+        rolled._following_days = self._similar_days(weather_data)
+        return rolled
+
+    def _state(self):
+        """(dict<str, array>) Each predicted field of the days following
+        the similar days."""
+        state = {"number_days": array("q", [self._number_days])}
+        for field in self.PREDICTED_FIELDS:
+            column = self._columns[field]
+            state[f"following {field}"] = array(
+                _TYPECODES[field], (column[day] for day in self._following_days))
+        return state
+
+    def _restore(self, state):
+        """Sets up the model from the state returned by _state."""
+        self._weather_data = None
+        self._forecast = None
+        self._number_days = state["number_days"][0]
+        self._scales = self._tree = None
+        self._columns = {field: state[f"following {field}"]
+                         for field in self.PREDICTED_FIELDS}
+        self._following_days = list(range(len(
+            self._columns[self.PREDICTED_FIELDS[0]])))
+
+    @classmethod
+    def _index(cls, weather_data):
+        """Builds a KDTree of every day followed by another.
+
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+
+        Return:
+            (tuple<tuple, list[float], KDTree, dict<str, array>>) Version of
+                the data, standard deviation of each field in FEATURE_FIELDS,
+                tree of the days and column of each field in PREDICTED_FIELDS.
+        """
+        size = weather_data.size()
+        columns = {field: weather_data.get_column(field, size)
+                   for field in cls.FEATURE_FIELDS + cls.PREDICTED_FIELDS}
+        scales = []
+        for field in cls.FEATURE_FIELDS:
+            column = columns[field]
+            mean = sum(column) / size
+            deviation = (sum((value - mean) ** 2 for value in column)
+                         / size) ** 0.5
+            # a field which never changes does not distinguish days
+            scales.append(deviation or 1.0)
+        points = list(zip(*(
+            [value / scale for value in columns[field][:size - 1]]
+            for field, scale in zip(cls.FEATURE_FIELDS, scales))))
+        return weather_data.version(), scales, KDTree(points), {
+            field: columns[field] for field in cls.PREDICTED_FIELDS}
+
+    def get_number_days(self):
+        """(int) Returns number of similar days being used"""
+        return self._number_days
+
+    def calculate_average(self, data):
+        """
+        Calculates the average of a field over the days following similar days
+
+        Parameters :
+            data (str): data gathered from WeatherData
+
+        Return:
+            (float) average
+        """
+        column = self._columns[GETTERS[data]]
+        return (sum(column[day] for day in self._following_days)
+                / self._number_days)
+
+    def chance_of_rain(self):
+        """(int) Percentage of days following similar days on which it rained"""
+        rain = self._columns["rain"]
+        rainy_days = sum(1 for day in self._following_days
+                         if rain[day] >= self.RAIN_THRESHOLD)
+        return round(100 * rainy_days / self._number_days)
+
+    def high_temperature(self):
+        """(float) Returns the average high temperature after similar days"""
+        return self.calculate_average("get_high_temperature")
+
+    def low_temperature(self):
+        """(float) Returns the average low temperature after similar days"""
+        return self.calculate_average("get_low_temperature")
+
+    def humidity(self):
+        """(int) Calculates average humidity after similar days"""
+        return round(self.calculate_average("get_humidity"))
+
+    def cloud_cover(self):
+        """(int) Calculates average cloud cover after similar days"""
+        return round(self.calculate_average("get_cloud_cover"))
+
+    def wind_speed(self):
+        """(int) Calculates average wind speed after similar days"""
+        return round(self.calculate_average("get_average_wind_speed"))
+
+
 class SophisticatedPrediction(WeatherPrediction):
     """Sophisticated prediction model that predicts weather based on n days worth of weather data
     """
 
+    # Fields averaged over the n days by the prediction rules.
+    AVERAGED_FIELDS = ("rain", "temperature_high", "temperature_low",
+                       "humidity", "cloud_cover", "wind_speed_average",
+                       "air_pressure")
+
     def __init__(self, weather_data, n_days):
         """
         Parameters:
@@ -216,17 +1520,56 @@ class SophisticatedPrediction(WeatherPrediction):
             weather_data.size() > 0
         """
         super().__init__(weather_data)
+        self._window_days = n_days
         # restricts data set size
         if n_days > weather_data.size():
             n_days = weather_data.size()
-        self._sophisticated_prediction = self._weather_data.get_data(n_days)
-        self._yesterday_value = self._sophisticated_prediction[-1]
+        self._yesterday_value = weather_data.get_data(1)[0]
         self._number_days = n_days
+        # every window statistic used by the rules, found once from the data
+        self._averages = {field: weather_data.window_mean(field, n_days)
+                          for field in self.AVERAGED_FIELDS}
+        self._air_pressure = round(self._averages["air_pressure"])
 
     def get_number_days(self):
         """(int) Returns number of days of data being used"""
         return self._number_days
 
+    def forecast_each_day(self, weather_data, first_day):
+        """Forecasts each day of weather data from first_day on, as a model
+        with the same number of days made from the days before it would.
+
+        The rules are applied to the window means found for every day at
+        once by rolling_mean, see SimplePrediction.forecast_each_day.
+
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+            first_day (int): Position of the first day to forecast.
+
+        Pre-condition:
+            0 < first_day
+
+        Return:
+            (list[Forecast]) Forecast of each day from first_day onwards.
+        """
+        n_days = self._window_days
+        averages = {field: weather_data.rolling_mean(field, n_days)
+                    for field in self.AVERAGED_FIELDS}
+        items = weather_data.get_data(weather_data.size())
+        model = copy(self)
+        model._weather_data = None
+        forecasts = []
+        # each day is forecast from the window ending the day before it
+        for day in range(first_day - 1, weather_data.size() - 1):
+            model._forecast = None
+            model._number_days = min(n_days, day + 1)
+            model._yesterday_value = items[day]
+            model._averages = {field: means[day]
+                               for field, means in averages.items()}
+            model._air_pressure = round(model._averages["air_pressure"])
+            forecasts.append(model.forecast())
+        return forecasts
+
     def calculate_average(self, data):
         """
         Calculate the average value from the data
@@ -237,16 +1580,16 @@ class SophisticatedPrediction(WeatherPrediction):
         Return:
             (float) average
         """
-        running_average = 0
-        # for each row in the data set, get appropriate value and use appropriate method
-        for row in self._sophisticated_prediction:
-            running_average += getattr(row, data)()
-        total_average = running_average/self._number_days
-        return total_average
-        
+        field = GETTERS[data]
+        # averages used by the rules were found when the model was created
+        if field not in self._averages:
+            self._averages[field] = self._weather_data.window_mean(
+                field, self._number_days)
+        return self._averages[field]
+
     def air_pressure(self):
         """(int) Calculates the average air pressure for the past n days."""
-        return round(self.calculate_average("get_air_pressure"))
+        return self._air_pressure
 
     def chance_of_rain(self):
         """(int) Calculates the average rainfall for the past n days"""
@@ -312,6 +1655,465 @@ class SophisticatedPrediction(WeatherPrediction):
         return round(total_average_wind_speed)
 
 
+# Models combined by an EnsemblePrediction, and the weight of each model in
+# each Forecast field, in the same order.
+EnsembleWeights = namedtuple("EnsembleWeights", ("members", "weights"))
+
+# Key of files of ensemble weights written by save_ensemble_weights.
+_ENSEMBLE_WEIGHTS_KEY = "EnsembleWeights"
+
+
+def save_ensemble_weights(path, ensemble_weights):
+    """Saves the weights of an ensemble to a binary file.
+
+    Parameters:
+        path (str): Name of the file to write.
+        ensemble_weights (EnsembleWeights): Weights to save.
+    """
+    write_columns(path, {field: array("d", ensemble_weights.weights[field])
+                         for field in Forecast._fields},
+                  ensemble_weights.members, _ENSEMBLE_WEIGHTS_KEY)
+
+
+def load_ensemble_weights(path):
+    """Loads the weights of an ensemble saved by save_ensemble_weights.
+
+    Parameters:
+        path (str): Name of the file to read.
+
+    Return:
+        (EnsembleWeights) The saved weights.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file does not hold ensemble weights.
+    """
+    weights, members = read_columns(path, _ENSEMBLE_WEIGHTS_KEY)
+    if (set(weights) != set(Forecast._fields)
+            or any(len(column) != len(members) for column in weights.values())
+            or not set(members) <= set(EnsemblePrediction.MODEL_TYPES)):
+        raise ValueError("Ensemble weights file is corrupt")
+    return EnsembleWeights(tuple(members), weights)
+
+
+class _SharedWindow(object):
+    """Weather data which keeps the window statistics found from it, so that
+    models made from it share them rather than each finding them again."""
+
+    def __init__(self, weather_data):
+        """
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+        """
+        self._weather_data = weather_data
+        self._found = {}
+
+    def __getattr__(self, name):
+        """Answers any other query from the weather data."""
+        return getattr(self._weather_data, name)
+
+    def snapshot(self):
+        """Returns the weather data as it is now, see WeatherData.snapshot.
+
+        Return:
+            (WeatherDataView or _SharedWindow) Snapshot of the weather data,
+                or this window if it was restored, as it never changes.
+        """
+        if self._weather_data is None:
+            return self
+        return self._weather_data.snapshot()
+
+    def _shared(self, query, *parameters):
+        """Result of a query of the weather data, found the first time."""
+        key = (query,) + parameters
+        if key not in self._found:
+            self._found[key] = getattr(self._weather_data, query)(*parameters)
+        return self._found[key]
+
+    def state(self):
+        """Finds the statistics found so far, as saved by
+        WeatherPrediction.save.
+
+        Wind directions are saved as codes into a table of the directions
+        saved with them, rather than into WIND_DIRECTIONS, which differs
+        between processes that have loaded different data.
+
+        Return:
+            (dict<str, array or str>) Results of each query, named by the
+                query, and each direction in the table of directions.
+        """
+        state = {}
+        # code of each wind direction saved, in order
+        directions = {}
+        for key, value in self._found.items():
+            if key[0] == "get_data":
+                for field, _, _, typecode in FIELDS:
+                    values = [getattr(item, _FIELD_GETTERS[field])()
+                              for item in value]
+                    if field == "wind_direction":
+                        values = [directions.setdefault(direction,
+                                                        len(directions))
+                                  for direction in values]
+                    state[f"get_data {key[1]} {field}"] = array(typecode,
+                                                                values)
+            else:
+                state[" ".join(map(str, key))] = array(
+                    "q" if isinstance(value, int) else "d", [value])
+        for direction, code in directions.items():
+            state[f"direction {code}"] = direction
+        return state
+
+    @classmethod
+    def restored(cls, state):
+        """Makes a window answering only the queries saved in a state.
+
+        Parameters:
+            state (dict<str, array or str>): State including the statistics
+                                             returned by state().
+
+        Return:
+            (_SharedWindow) Window without any weather data.
+        """
+        window = cls(None)
+        items = {}
+        directions = {int(name.split(" ")[1]): direction
+                      for name, direction in state.items()
+                      if name.startswith("direction ")}
+        for name, values in state.items():
+            query, *parameters = name.split(" ")
+            if query == "size":
+                window._found[("size",)] = values[0]
+            elif query in ("window_mean", "window_max", "window_min"):
+                field, number_days = parameters
+                window._found[(query, field, int(number_days))] = values[0]
+            elif query == "get_data":
+                number_days, field = parameters
+                if field == "wind_direction":
+                    values = [directions[code] for code in values]
+                items.setdefault(int(number_days), {})[field] = values
+        for number_days, columns in items.items():
+            window._found[("get_data", number_days)] = [
+                WeatherDataItem(*values) for values in zip(
+                    *(columns[field] for field, _, _, _ in FIELDS))]
+        return window
+
+    def size(self):
+        """(int) Number of days of weather data."""
+        return self._shared("size")
+
+    def get_data(self, number_days):
+        """(list[WeatherDataItem]) The most recent number_days days."""
+        return self._shared("get_data", number_days)
+
+    def window_mean(self, field, number_days):
+        """(float) Mean of a field over the most recent number_days days."""
+        return self._shared("window_mean", field, number_days)
+
+    def window_max(self, field, number_days):
+        """Largest value of a field over the most recent number_days days."""
+        return self._shared("window_max", field, number_days)
+
+    def window_min(self, field, number_days):
+        """Smallest value of a field over the most recent number_days days."""
+        return self._shared("window_min", field, number_days)
+
+
+class EnsemblePrediction(WeatherPrediction):
+    """Prediction model that predicts each field as a weighted average of
+    the forecasts of several other models.
+
+    Weights are fitted offline from each model's past errors, by
+    backtest.fit_ensemble_weights, and loaded with load_ensemble_weights.
+    """
+
+    # Every model an ensemble can combine, by name.
+    MODEL_TYPES = {"Yesterday's weather": YesterdaysWeather,
+                   "Simple prediction": SimplePrediction,
+                   "Sophisticated prediction": SophisticatedPrediction,
+                   "Exponential smoothing": ExponentialSmoothingPrediction,
+                   "Regression": RegressionPrediction,
+                   "Analog": AnalogPrediction}
+
+    # Models combined when no weights are given, with equal weights.
+    DEFAULT_MEMBERS = ("Yesterday's weather", "Simple prediction",
+                       "Sophisticated prediction")
+
+    # Models answering only window queries, which share their statistics.
+    # The others keep indexes of the weather data itself.
+    WINDOW_MODELS = (YesterdaysWeather, SimplePrediction,
+                     SophisticatedPrediction)
+
+    def __init__(self, weather_data, n_days, ensemble_weights=None):
+        """
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+            n_days (int): number of days worth of data used by each model
+            ensemble_weights (EnsembleWeights): Models to combine and their
+                weights, or None for equal weights of DEFAULT_MEMBERS.
+
+        Pre-condition:
+            weather_data.size() > 0, or more for some models
+        """
+        super().__init__(weather_data)
+        if ensemble_weights is None:
+            share = 1 / len(self.DEFAULT_MEMBERS)
+            ensemble_weights = EnsembleWeights(self.DEFAULT_MEMBERS, {
+                field: array("d", repeat(share, len(self.DEFAULT_MEMBERS)))
+                for field in Forecast._fields})
+        self._number_days = n_days
+        self._ensemble_weights = ensemble_weights
+        shared = _SharedWindow(weather_data)
+        self._members = [self.make_member(name, weather_data, n_days, shared)
+                         for name in ensemble_weights.members]
+
+    @classmethod
+    def make_member(cls, name, weather_data, n_days, shared=None):
+        """Makes one of the models an ensemble can combine.
+
+        Parameters:
+            name (str): Name of the model in MODEL_TYPES.
+            weather_data (WeatherData): Collection of weather data.
+            n_days (int): number of days worth of data
+            shared (_SharedWindow): Window statistics of weather_data shared
+                                    with other models, if any.
+
+        Return:
+            (WeatherPrediction) The model.
+        """
+        model_type = cls.MODEL_TYPES[name]
+        if shared is not None and model_type in cls.WINDOW_MODELS:
+            weather_data = shared
+        if model_type is YesterdaysWeather:
+            return YesterdaysWeather(weather_data)
+        return model_type(weather_data, n_days)
+
+    def get_number_days(self):
+        """(int) Returns number of days of data used by each model"""
+        return self._number_days
+
+    def _rolled(self, weather_data):
+        """(EnsemblePrediction) Copy of the ensemble with each of its models
+        rolled on to weather_data, so none is fitted again."""
+        rolled = copy(self)
+        rolled._weather_data = weather_data
+        rolled._forecast = None
+        shared = _SharedWindow(weather_data)
+        rolled._members = [
+            member._rolled(shared if type(member) in self.WINDOW_MODELS
+                           else weather_data)
+            for member in self._members]
+        return rolled
+
+    def _state(self):
+        """(dict<str, array or str>) Weights, and the state of each member
+        prefixed by its position."""
+        state = {"number_days": array("q", [self._number_days])}
+        for field, weights in self._ensemble_weights.weights.items():
+            state[f"weights {field}"] = array("d", weights)
+        for position, (name, member) in enumerate(
+                zip(self._ensemble_weights.members, self._members)):
+            state[f"member {position}"] = name
+            state[f"{position}/type"] = type(member).__name__
+            for part, value in member._state().items():
+                state[f"{position}/{part}"] = value
+        return state
+
+    def _restore(self, state):
+        """Sets up the model from the state returned by _state."""
+        self._weather_data = None
+        self._forecast = None
+        self._number_days = state["number_days"][0]
+        members = []
+        position = 0
+        while f"member {position}" in state:
+            members.append(state[f"member {position}"])
+            position += 1
+        self._ensemble_weights = EnsembleWeights(tuple(members), {
+            field: state[f"weights {field}"] for field in Forecast._fields})
+        self._members = []
+        for position in range(len(members)):
+            prefix = f"{position}/"
+            self._members.append(_restored({
+                name[len(prefix):]: value for name, value in state.items()
+                if name.startswith(prefix)}))
+
+    def combine(self, field):
+        """
+        Weighted average of one field of the models' forecasts
+
+        Parameters:
+            field (str): Name of a Forecast field.
+
+        Return:
+            (float) average
+        """
+        return sum(map(mul, self._ensemble_weights.weights[field],
+                       (getattr(member.forecast(), field)
+                        for member in self._members)))
+
+    def chance_of_rain(self):
+        """(int) Returns the weighted average chance of rain"""
+        return round(self.combine("chance_of_rain"))
+
+    def high_temperature(self):
+        """(float) Returns the weighted average high temperature"""
+        return self.combine("high_temperature")
+
+    def low_temperature(self):
+        """(float) Returns the weighted average low temperature"""
+        return self.combine("low_temperature")
+
+    def humidity(self):
+        """(int) Returns the weighted average humidity"""
+        return round(self.combine("humidity"))
+
+    def cloud_cover(self):
+        """(int) Returns the weighted average cloud cover"""
+        return round(self.combine("cloud_cover"))
+
+    def wind_speed(self):
+        """(int) Returns the weighted average wind speed"""
+        return round(self.combine("wind_speed"))
+
+
+def _model_types(model_type=WeatherPrediction):
+    """(iterator<type>) Every subclass of a prediction model."""
+    for subclass in model_type.__subclasses__():
+        yield subclass
+        yield from _model_types(subclass)
+
+
+def _restored(state):
+    """Makes a model from a state returned by WeatherPrediction._state.
+
+    Parameters:
+        state (dict<str, array or str>): State of the model, and the name of
+                                         its type as "type".
+
+    Return:
+        (WeatherPrediction) The model.
+
+    Raises:
+        ValueError: If the type is not a prediction model.
+    """
+    for model_type in _model_types():
+        if model_type.__name__ == state.get("type"):
+            model = model_type.__new__(model_type)
+            model._restore(state)
+            return model
+    raise ValueError(f"Unknown prediction model {state.get('type')!r}")
+
+
+def load_model(path):
+    """Loads a model saved by WeatherPrediction.save.
+
+    The model forecasts from its saved state rather than weather data, so
+    forecast_horizons and forecast_quantiles, which need the data, cannot
+    be used.
+
+    Parameters:
+        path (str): Name of the file to read.
+
+    Return:
+        (WeatherPrediction) The saved model.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file does not hold a saved model.
+    """
+    arrays, strings = read_arrays(path, _MODEL_STATE_KEY)
+    state = dict(arrays)
+    state.update(zip(strings[::2], strings[1::2]))
+    try:
+        return _restored(state)
+    except (KeyError, IndexError, TypeError) as error:
+        raise ValueError("Saved model is corrupt") from error
+
+
+def _hashable(value):
+    """Converts a parameter of a model to a form that can key a dictionary.
+
+    Dictionaries become tuples of their items, ordered by key, and lists,
+    arrays and tuples become tuples, converting their contents likewise.
+
+    Parameters:
+        value: Parameter of a model, e.g. n_days or EnsembleWeights.
+
+    Return:
+        Value equal to the hashable form of any equal parameter.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item))
+                            for key, item in value.items()))
+    if isinstance(value, (list, tuple, array)):
+        return tuple(map(_hashable, value))
+    return value
+
+
+class ForecastCache(object):
+    """Prediction models made from weather data, kept so that repeated
+    requests for the same model reuse its forecast.
+
+    Models are keyed by their type, their parameters and the version of the
+    data, so a new model is made once the data changes. When the cache is
+    full the least recently requested model is dropped.
+    """
+
+    def __init__(self, max_size=128):
+        """
+        Parameters:
+            max_size (int): Number of models kept.
+
+        Pre-condition:
+            max_size > 0
+        """
+        self._max_size = max_size
+        self._models = OrderedDict()
+
+    def __len__(self):
+        """(int) Number of models kept."""
+        return len(self._models)
+
+    def clear(self):
+        """Drops every model kept."""
+        self._models.clear()
+
+    def model(self, model_type, weather_data, *parameters):
+        """Returns a prediction model, made only if not already kept.
+
+        Parameters:
+            model_type (type): Subclass of WeatherPrediction.
+            weather_data (WeatherData): Collection of weather data.
+            parameters: Further arguments of model_type, e.g. n_days.
+
+        Return:
+            (WeatherPrediction) model_type(weather_data, *parameters), or
+                the same model made from the same version of the data.
+        """
+        key = (model_type, _hashable(parameters), weather_data.version())
+        model = self._models.get(key)
+        if model is None:
+            model = self._models[key] = model_type(weather_data, *parameters)
+            if len(self._models) > self._max_size:
+                self._models.popitem(last=False)
+        else:
+            self._models.move_to_end(key)
+        return model
+
+    def forecast(self, model_type, weather_data, *parameters):
+        """Returns the forecast of a prediction model, kept by model.
+
+        Parameters:
+            model_type (type): Subclass of WeatherPrediction.
+            weather_data (WeatherData): Collection of weather data.
+            parameters: Further arguments of model_type, e.g. n_days.
+
+        Return:
+            (Forecast) Forecast of model_type(weather_data, *parameters).
+        """
+        return self.model(model_type, weather_data, *parameters).forecast()
+
+
 if __name__ == "__main__":
     print("This module provides the weather prediction models",
           "and is not meant to be executed on its own.")
@@ -0,0 +1,228 @@
+"""
+    Forecasts for many weather stations at once, from their weather data
+    stacked into one array per field.
+
+    The window statistics of every station are found together, a day at a
+    time across all stations, totalled exactly in tenths as each station's
+    own prefix sums are. The prediction models' rules are then applied to
+    each station's statistics, so the forecasts are exactly those of the
+    models.
+
+    StationStack: Weather data of many stations, as a station x day array
+                  of each field.
+    batch_forecasts: Forecasts of every station by one prediction model.
+"""
+
+from array import array
+from itertools import repeat
+from operator import add
+
+from weather_data import FIELDS, WIND_DIRECTIONS, WeatherDataItem
+from weather_index import from_tenths, tenths
+from prediction import (YesterdaysWeather, SimplePrediction,
+                        SophisticatedPrediction)
+
+# Prediction models whose forecasts batch_forecasts can find.
+BATCH_MODELS = (YesterdaysWeather, SimplePrediction, SophisticatedPrediction)
+
+# Fields averaged over each station's window, for any of BATCH_MODELS.
+AVERAGED_FIELDS = SophisticatedPrediction.AVERAGED_FIELDS
+
+
+class StationStack(object):
+    """Weather data of many stations, stored as one flat array per field
+    holding each station's days in turn.
+
+    Stations with fewer days are padded at the start with zeros, which
+    leave running totals unchanged.
+    """
+
+    def __init__(self, columns, sizes):
+        """
+        Parameters:
+            columns (dict<str, array>): Each field in FIELDS for every day of
+                every station, station by station, with wind directions as
+                indices into WIND_DIRECTIONS.
+            sizes (list[int]): Number of days of data of each station.
+
+        Pre-condition:
+            Every column has len(sizes) * max(sizes) values.
+        """
+        self._columns = columns
+        self._sizes = array("i", sizes)
+        self._number_days = max(sizes) if sizes else 0
+
+    @classmethod
+    def from_weather_data(cls, weather_data):
+        """Stacks the weather data of several stations.
+
+        Parameters:
+            weather_data (list[WeatherData]): Weather data of each station.
+
+        Return:
+            (StationStack) The stations' data.
+        """
+        sizes = [station.size() for station in weather_data]
+        number_days = max(sizes) if sizes else 0
+        columns = {}
+        for field, _, _, typecode in FIELDS:
+            column = array(typecode)
+            for station, size in zip(weather_data, sizes):
+                column.extend(repeat(0, number_days - size))
+                if size:
+                    column.extend(station.get_column(field, size))
+            columns[field] = column
+        return cls(columns, sizes)
+
+    def number_stations(self):
+        """(int) Number of stations."""
+        return len(self._sizes)
+
+    def number_days(self):
+        """(int) Number of days of the station with the most data."""
+        return self._number_days
+
+    def sizes(self):
+        """(array<int>) Number of days of data of each station."""
+        return self._sizes
+
+    def day(self, station, day):
+        """Returns the weather of one day of a station.
+
+        Parameters:
+            station (int): Position of the station.
+            day (int): Position of the day in the stacked days, including any
+                       padding before the station's data.
+
+        Return:
+            (WeatherDataItem) The day's weather.
+        """
+        position = station * self._number_days + day
+        values = [WIND_DIRECTIONS[self._columns[field][position]]
+                  if field == "wind_direction"
+                  else self._columns[field][position]
+                  for field, _, _, _ in FIELDS]
+        return WeatherDataItem(*values)
+
+    def days(self, field, day):
+        """Returns one field of one day of every station.
+
+        Parameters:
+            field (str): Name of a field in FIELDS.
+            day (int): Position of the day in the stacked days.
+
+        Return:
+            (array) Value of the field for each station.
+        """
+        return self._columns[field][day::self._number_days]
+
+
+class _StationWindow(object):
+    """Window statistics of one station, answering the queries the models
+    in BATCH_MODELS make of their weather data."""
+
+    def __init__(self, size, yesterday, means, highest, lowest):
+        """
+        Parameters:
+            size (int): Number of days of data of the station.
+            yesterday (WeatherDataItem): Most recent day of the station.
+            means (dict<str, float>): Mean of each field in AVERAGED_FIELDS.
+            highest (float): Highest high temperature of the window.
+            lowest (float): Lowest low temperature of the window.
+        """
+        self._size = size
+        self._yesterday = yesterday
+        self._means = means
+        self._highest = highest
+        self._lowest = lowest
+
+    def size(self):
+        """(int) Number of days of data of the station."""
+        return self._size
+
+    def snapshot(self):
+        """(_StationWindow) The window itself, which never changes."""
+        return self
+
+    def get_data(self, number_days):
+        """(list[WeatherDataItem]) The most recent day, for number_days 1."""
+        return [self._yesterday]
+
+    def window_mean(self, field, number_days):
+        """(float) Mean of a field in AVERAGED_FIELDS over the window."""
+        return self._means[field]
+
+    def window_max(self, field, number_days):
+        """(float) Highest high temperature over the window."""
+        return self._highest
+
+    def window_min(self, field, number_days):
+        """(float) Lowest low temperature over the window."""
+        return self._lowest
+
+
+def batch_forecasts(stack, model_type, n_days=1):
+    """Forecasts the weather of every station with one prediction model.
+
+    Parameters:
+        stack (StationStack): Weather data of the stations.
+        model_type (type): One of BATCH_MODELS.
+        n_days (int): Number of days used by SimplePrediction and
+                      SophisticatedPrediction.
+
+    Pre-condition:
+        Every station has at least one day of data.
+
+    Return:
+        (list[Forecast]) Forecast of each station, equal to
+            model_type(weather_data, n_days).forecast() for its weather data.
+
+    Raises:
+        ValueError: If model_type is not one of BATCH_MODELS.
+    """
+    if model_type not in BATCH_MODELS:
+        raise ValueError(f"{model_type.__name__} cannot forecast in batches")
+    if model_type is YesterdaysWeather:
+        n_days = 1
+    number_days = stack.number_days()
+    first_day = max(number_days - n_days, 0)
+
+    means = {}
+    for field in AVERAGED_FIELDS:
+        # totals in tenths of every station's window at once; days before
+        # the window are not needed, as the totals are exact
+        totals = list(repeat(0, stack.number_stations()))
+        for day in range(first_day, number_days):
+            totals = list(map(add, totals, tenths(stack.days(field, day))))
+        means[field] = list(map(from_tenths, totals))
+
+    sizes = stack.sizes()
+    shortest = min(sizes)
+    extremes = []
+    for field, choose in (("temperature_high", max), ("temperature_low", min)):
+        # every station has data on the last day, so the search starts there
+        extreme = list(stack.days(field, number_days - 1))
+        for day in range(number_days - 2, first_day - 1, -1):
+            values = stack.days(field, day)
+            if number_days - day > shortest:
+                # stations with fewer days have padding rather than data
+                values = [value if number_days - size <= day else current
+                          for value, size, current
+                          in zip(values, sizes, extreme)]
+            extreme = list(map(choose, extreme, values))
+        extremes.append(extreme)
+
+    forecasts = []
+    for station, size in enumerate(sizes):
+        window_days = min(n_days, size)
+        window = _StationWindow(
+            size, stack.day(station, number_days - 1),
+            {field: means[field][station] / window_days
+             for field in AVERAGED_FIELDS},
+            extremes[0][station], extremes[1][station])
+        if model_type is YesterdaysWeather:
+            model = YesterdaysWeather(window)
+        else:
+            model = model_type(window, n_days)
+        forecasts.append(model.forecast())
+    return forecasts
@@ -0,0 +1,151 @@
+"""
+    Walk-forward evaluation of prediction models over a grid of settings.
+
+    Every combination of station, model and number of days is backtested
+    in a pool of processes. Each station's data is saved once as a file of
+    columns, which the workers map into memory, so they share its pages
+    rather than each receiving a copy.
+
+    sweep: Evaluates every combination and writes a ranked results table.
+"""
+
+import csv
+import os
+import sys
+import tempfile
+from multiprocessing import Pool
+
+import backtest
+from weather_data import ColumnarWeatherData
+from prediction import (SimplePrediction, SophisticatedPrediction,
+                        ExponentialSmoothingPrediction, Forecast)
+
+# Prediction models which use a number of days, by name.
+MODEL_TYPES = {"Simple prediction": SimplePrediction,
+               "Sophisticated prediction": SophisticatedPrediction,
+               "Exponential smoothing": ExponentialSmoothingPrediction}
+
+# Numbers of days tried for each model.
+N_DAYS_OPTIONS = (1, 2, 3, 5, 7, 10, 14, 21, 28)
+
+# Forecast field whose mean absolute error ranks the results.
+RANK_FIELD = "high_temperature"
+
+# Weather data mapped by this worker process, by column file name.
+_mapped = {}
+
+
+def _evaluate(task):
+    """Backtests one combination of settings, in a worker process.
+
+    Parameters:
+        task (tuple<str, str, str, int, int>): Station name, column file,
+            model name, number of days and first day to forecast.
+
+    Return:
+        (tuple<str, str, int, dict>) Station, model name and number of days,
+            and the errors returned by backtest.score.
+    """
+    station, column_file, model_name, n_days, first_day = task
+    weather_data = _mapped.get(column_file)
+    if weather_data is None:
+        # Kept so that later tasks reuse the indexes built over the data.
+        weather_data = _mapped[column_file] = ColumnarWeatherData()
+        weather_data.open(column_file)
+    model_type = MODEL_TYPES[model_name]
+    errors = backtest.evaluate(
+        weather_data, lambda data: model_type(data, n_days), first_day)
+    return station, model_name, n_days, errors
+
+
+def _rank(results, rank_field):
+    """Orders results by station, then mean absolute error of a field.
+
+    Parameters:
+        results (list[tuple<str, str, int, dict>]): Results from _evaluate.
+        rank_field (str): Forecast field whose error orders the results.
+
+    Return:
+        (list[list]) Row of the results table for each result, with its
+                     rank amongst the results of its station.
+    """
+    results = sorted(results, key=lambda result: (result[0],
+                                                  result[3][rank_field][0],
+                                                  result[1], result[2]))
+    rows = []
+    rank = 0
+    for position, (station, model_name, n_days, errors) in enumerate(results):
+        if position == 0 or results[position - 1][0] != station:
+            rank = 0
+        rank += 1
+        row = [rank, station, model_name, n_days]
+        for field in Forecast._fields:
+            row.extend(round(error, 4) for error in errors[field])
+        rows.append(row)
+    return rows
+
+
+def sweep(weather_files, results_file, n_days_options=N_DAYS_OPTIONS,
+          model_names=tuple(MODEL_TYPES), rank_field=RANK_FIELD,
+          processes=None):
+    """Evaluates every combination of station, model and number of days.
+
+    All combinations are scored on the same days of a station: those after
+    the largest number of days tried, or all but the first day if the
+    station has no more days than that.
+
+    Parameters:
+        weather_files (list[str]): Name of the CSV file of each station.
+        results_file (str): Name of the CSV file to write the results to.
+        n_days_options (list[int]): Numbers of days to try.
+        model_names (list[str]): Names of the models in MODEL_TYPES to try.
+        rank_field (str): Forecast field whose mean absolute error ranks
+                          the results of each station.
+        processes (int): Number of worker processes, or None for one per CPU.
+
+    Return:
+        (list[list]) Rows of the results table, as written to results_file.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        tasks = []
+        for number, weather_file in enumerate(weather_files):
+            weather_data = ColumnarWeatherData()
+            # the columns are saved to the temporary directory instead of
+            # a sidecar beside the station's file
+            weather_data.load(weather_file, cache=False)
+            column_file = os.path.join(directory, f"{number}.wxc")
+            weather_data.save(column_file)
+            first_day = min(max(n_days_options), weather_data.size() - 1)
+            station = os.path.splitext(os.path.basename(weather_file))[0]
+            tasks.extend((station, column_file, model_name, n_days, first_day)
+                         for model_name in model_names
+                         for n_days in n_days_options)
+        with Pool(processes) as pool:
+            results = list(pool.imap_unordered(_evaluate, tasks))
+
+    rows = _rank(results, rank_field)
+    with open(results_file, "w", newline="") as results_details:
+        writer = csv.writer(results_details)
+        heading = ["Rank", "Station", "Model", "Days"]
+        for field in Forecast._fields:
+            heading.extend((f"{field} MAE", f"{field} RMSE"))
+        writer.writerow(heading)
+        writer.writerows(rows)
+    return rows
+
+
+def main(results_file="sweep_results.csv", *weather_files):
+    """Sweeps the default grid over CSV files of weather data.
+
+    Parameters:
+        results_file (str): Name of the CSV file to write the results to.
+        weather_files (str): Name of the CSV file of each station.
+    """
+    rows = sweep(weather_files or ("weather_data.csv",), results_file)
+    for rank, station, model_name, n_days, *_ in rows:
+        if rank == 1:
+            print(f"{station}: {model_name} with {n_days} days")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
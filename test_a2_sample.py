@@ -12,11 +12,32 @@ your program is working as outlined in the assignment sheet.
 __author__ = "Steven Summers"
 
 import inspect
+import os
+import random
+import tempfile
+from array import array
+from datetime import date
 
 from testrunner import (OrderedTestCase, TestMaster, RedirectStdIO,
                         AttributeGuesser, skipIfFailed)
 
-from weather_data import WeatherData, WeatherDataItem
+import backtest
+import stations
+import sweep
+import weather_store
+from weather_data import (WeatherData, WeatherDataItem, ColumnarWeatherData,
+                          CompactWeatherDataItem, WeatherDataView,
+                          WIND_DIRECTIONS)
+from weather_index import KDTree, PrefixSums, SparseTable
+
+
+class WalkedArray(array):
+    """ array counting how many times it is iterated over from the start """
+    walks = 0
+
+    def __iter__(self):
+        WalkedArray.walks += 1
+        return super().__iter__()
 
 
 class TestA2(OrderedTestCase):
@@ -240,6 +261,21 @@ class TestFunctionality(TestA2):
 
         self.aggregate_tests()
 
+    @skipIfFailed(test_name='test_sophisticated_prediction')
+    def test_forecast(self):
+        """ test WeatherPrediction.forecast predicts every field once """
+        for model in (self.prediction.YesterdaysWeather(self.data),
+                      self.prediction.SimplePrediction(self.data, 4),
+                      self.prediction.SophisticatedPrediction(self.data, 10)):
+            forecast = model.forecast()
+
+            self.aggregate(self.assertEqual, forecast,
+                           (model.chance_of_rain(), model.high_temperature(), model.low_temperature(),
+                            model.humidity(), model.cloud_cover(), model.wind_speed()), tag='forecast')
+            self.aggregate(self.assertIs, model.forecast(), forecast, tag='cached')
+
+        self.aggregate_tests()
+
 
 class TestHighTempEdgeCases(TestA2):
     """
@@ -395,6 +431,922 @@ class TestEventDecisionEdgeCases(TestA2):
 
         self.aggregate_tests()
 
+    @skipIfFailed(TestDesign, TestDesign.test_event_defined.__name__, tag='defined')
+    @skipIfFailed(TestDesign, TestDesign.test_event_decision_defined.__name__, tag='defined')
+    def test_batch_advisability(self):
+        """Test batch_advisability matches ED.advisability for every event"""
+        weather_data = WeatherData()
+        weather_data._weather_data.append(WeatherDataItem(5, 44, 20, 10, 75, 4, 30, "ESE", 6, 1016.3))
+        sp = self.prediction.SimplePrediction(weather_data, 1)
+        times = [time for time in range(24) for _ in range(4)] + [24, 5.5, 3, 12]
+        outdoors = [True, True, False, False] * 25
+        cover = [True, False, True, False] * 24 + [True, 1, 'yes', None]
+        expected = [self.event_decision.EventDecision(
+                        self.event_decision.Event('My Event', *details), sp).advisability()
+                    for details in zip(outdoors, cover, times)]
+
+        self.aggregate(self.assertEqual,
+                       self.event_decision.batch_advisability(times, outdoors, cover, sp),
+                       expected, tag='batch_advisability')
+
+        self.aggregate_tests()
+
+
+class TestColumnarWeatherData(TestA2):
+    """ Test the columnar storage backend matches WeatherData """
+    def test_columnar_data(self):
+        """ test ColumnarWeatherData size, get_data and get_column """
+        columnar = ColumnarWeatherData()
+        columnar.load('weather_data.csv')
+
+        self.aggregate(self.assertEqual, columnar.size(), self.data.size(), tag='size')
+        self.aggregate(self.assertEqual, [str(item) for item in columnar.get_data(5)],
+                       [str(item) for item in self.data.get_data(5)], tag='get_data')
+        self.aggregate(self.assertEqual, list(columnar.get_column('humidity', 3)),
+                       list(self.data.get_column('humidity', 3)), tag='get_column')
+
+        self.aggregate_tests()
+
+    def test_compact_items(self):
+        """ test WeatherData(compact=True) holds equivalent CompactWeatherDataItems """
+        compact = WeatherData(compact=True)
+        compact.load('weather_data.csv')
+        item = compact.get_data(1)[0]
+
+        self.aggregate(self.assertIsInstance, item, CompactWeatherDataItem, tag='type')
+        self.aggregate(self.assertFalse, hasattr(item, '__dict__'), tag='__slots__')
+        self.aggregate(self.assertEqual, str(item), str(self.data.get_data(1)[0]), tag='__str__')
+
+        self.aggregate_tests()
+
+    def test_mapped_columns(self):
+        """ test ColumnarWeatherData.open maps columns saved by save """
+        columnar = ColumnarWeatherData()
+        columnar.load('weather_data.csv')
+        handle, column_file = tempfile.mkstemp(suffix='.wxc')
+        os.close(handle)
+        try:
+            columnar.save(column_file)
+            mapped = ColumnarWeatherData()
+            mapped.open(column_file)
+
+            self.aggregate(self.assertIsInstance, mapped.get_column('rain', 5), memoryview, tag='get_column')
+            self.aggregate(self.assertEqual, [str(item) for item in mapped.get_data(mapped.size())],
+                           [str(item) for item in self.data.get_data(self.data.size())], tag='get_data')
+            sp = self.prediction.SophisticatedPrediction(mapped, 10)
+            self.aggregate(self.assertAlmostEqual, sp.high_temperature(), 32.82, places=5, tag='prediction')
+            del mapped, sp
+        finally:
+            os.remove(column_file)
+
+        self.aggregate_tests()
+
+    def test_columnar_prediction(self):
+        """ test prediction models give the same results with ColumnarWeatherData """
+        columnar = ColumnarWeatherData()
+        columnar.load('weather_data.csv')
+        for model in (self.prediction.SimplePrediction, self.prediction.SophisticatedPrediction):
+            expected = model(self.data, 10)
+            actual = model(columnar, 10)
+            for method in ('chance_of_rain', 'high_temperature', 'low_temperature',
+                           'humidity', 'cloud_cover', 'wind_speed'):
+                self.aggregate(self.assertEqual, getattr(actual, method)(),
+                               getattr(expected, method)(), tag=method)
+
+        self.aggregate_tests()
+
+
+class TestDateIndex(TestA2):
+    """ Test looking up weather data by date """
+    def test_get_day(self):
+        """ test get_day and get_range find days by date """
+        for data in (self.data, ColumnarWeatherData()):
+            if data is not self.data:
+                data.load('weather_data.csv')
+            days = data.get_range(date(2019, 2, 3), date(2019, 2, 5))
+
+            self.aggregate(self.assertEqual, data.get_day(date(2019, 2, 3)).get_low_temperature(), 21.5,
+                           tag='get_day')
+            self.aggregate(self.assertRaises, KeyError, data.get_day, date(2019, 3, 1))
+            self.aggregate(self.assertEqual, [day.get_low_temperature() for day in days],
+                           [21.5, 21.1, 22.3], tag='get_range')
+            self.aggregate(self.assertEqual, data.get_range(date(2019, 3, 1), date(2019, 3, 5)), [],
+                           tag='get_range')
+
+        self.aggregate_tests()
+
+    def test_as_of(self):
+        """ test predictions as of a date use only the data up to that date """
+        as_of = self.data.as_of(date(2019, 2, 24))
+        truncated = WeatherData()
+        truncated._weather_data.extend(self.data.get_data(self.data.size())[:24])
+        expected = self.prediction.SophisticatedPrediction(truncated, 10)
+        actual = self.prediction.SophisticatedPrediction(as_of, 10)
+
+        self.aggregate(self.assertEqual, as_of.size(), 24, tag='size')
+        for method in ('chance_of_rain', 'high_temperature', 'low_temperature',
+                       'humidity', 'cloud_cover', 'wind_speed'):
+            self.aggregate(self.assertEqual, getattr(actual, method)(),
+                           getattr(expected, method)(), tag=method)
+
+        self.aggregate_tests()
+
+    def test_snapshot(self):
+        """ test a snapshot keeps the days the data had when it was taken """
+        handle, weather_file = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as weather_details:
+            weather_details.write(TestWeatherDataLoading.HEADER + TestWeatherDataLoading.ROW)
+        try:
+            for data in (WeatherData(), ColumnarWeatherData()):
+                data.load('weather_data.csv', cache=False)
+                snapshot = data.snapshot()
+                version = snapshot.version()
+                expected = (snapshot.size(), snapshot.window_mean('rain', 10),
+                            snapshot.window_max('temperature_high', 10),
+                            snapshot.get_data(1)[0].get_air_pressure())
+                for change in ('append', 'load'):
+                    if change == 'append':
+                        data._extend(next(data.iter_file(weather_file)))
+                    else:
+                        data.load(weather_file, cache=False)
+                    self.aggregate(self.assertEqual,
+                                   (snapshot.size(), snapshot.window_mean('rain', 10),
+                                    snapshot.window_max('temperature_high', 10),
+                                    snapshot.get_data(1)[0].get_air_pressure()),
+                                   expected, tag=f'{type(data).__name__} {change}')
+                    self.aggregate(self.assertEqual, snapshot.version(), version, tag=change)
+        finally:
+            os.remove(weather_file)
+
+        self.aggregate_tests()
+
+
+class TestWeatherIndexes(TestA2):
+    """ Test window queries answered from indexes over the columns """
+    def test_window_mean(self):
+        """ test window_mean matches the mean of the window, as days are appended """
+        data = WeatherData()
+        data.load('weather_data.csv')
+        for day in (TestHighTempEdgeCases.day_low, TestHighTempEdgeCases.day_high, None):
+            if day is not None:
+                data._weather_data.append(day)
+            for n in range(1, data.size() + 1):
+                column = data.get_column('temperature_high', n)
+                self.aggregate(self.assertAlmostEqual, data.window_mean('temperature_high', n),
+                               sum(column) / n, places=9, tag='window_mean')
+
+        self.aggregate_tests()
+
+    def test_index_updates(self):
+        """ test indexes are brought up to date without walking the whole column """
+        column = WalkedArray('d', (day % 40 / 10 for day in range(50000)))
+        prefix_sums = PrefixSums(column)
+        sparse_table = SparseTable(column, max)
+        WalkedArray.walks = 0
+        for day in range(100):
+            column.append(day / 10)
+            for _ in range(10):
+                self.aggregate(self.assertTrue, prefix_sums.update(column), tag='PrefixSums.update')
+                self.aggregate(self.assertTrue, sparse_table.update(column), tag='SparseTable.update')
+        self.aggregate(self.assertEqual, WalkedArray.walks, 0, tag='update')
+        self.aggregate(self.assertEqual, prefix_sums.window_sum(len(column) - 3, len(column)), 29.4,
+                       tag='PrefixSums.window_sum')
+        self.aggregate(self.assertEqual, sparse_table.window_extreme(len(column) - 150, len(column) - 90),
+                       3.9, tag='SparseTable.window_extreme')
+        self.aggregate(self.assertEqual, sparse_table.window_extreme(len(column) - 3, len(column)), 9.9,
+                       tag='SparseTable.window_extreme')
+
+        self.aggregate_tests()
+
+    def test_window_extremes(self):
+        """ test window_max and window_min match the window, as days are appended """
+        data = ColumnarWeatherData()
+        data.load('weather_data.csv')
+        for day in range(3):
+            if day:
+                data._extend({field: column[-day:] for field, column in data._columns.items()})
+            for n in range(1, data.size() + 1):
+                highs = data.get_column('temperature_high', n)
+                lows = data.get_column('temperature_low', n)
+                self.aggregate(self.assertEqual, data.window_max('temperature_high', n), max(highs),
+                               tag='window_max')
+                self.aggregate(self.assertEqual, data.window_min('temperature_low', n), min(lows),
+                               tag='window_min')
+
+        self.aggregate_tests()
+
+    def test_rolling_windows(self):
+        """ test rolling_mean, rolling_max and rolling_min match the window ending at each day """
+        data = WeatherData()
+        data.load('weather_data.csv')
+        for weather_data in (data, WeatherDataView(data, 12)):
+            for n in (1, 3, 4, 16, weather_data.size() + 5):
+                means = weather_data.rolling_mean('rain', n)
+                highs = weather_data.rolling_max('temperature_high', n)
+                lows = weather_data.rolling_min('temperature_low', n)
+                self.aggregate(self.assertEqual, len(means), weather_data.size(), tag='rolling_mean')
+                for day in range(weather_data.size()):
+                    window = WeatherDataView(data, day + 1)
+                    days = min(n, day + 1)
+                    self.aggregate(self.assertEqual, means[day], window.window_mean('rain', days),
+                                   tag='rolling_mean')
+                    self.aggregate(self.assertEqual, highs[day],
+                                   window.window_max('temperature_high', days), tag='rolling_max')
+                    self.aggregate(self.assertEqual, lows[day],
+                                   window.window_min('temperature_low', days), tag='rolling_min')
+
+        self.aggregate_tests()
+
+    def test_prediction_snapshot(self):
+        """ test SimplePrediction and SophisticatedPrediction keep the statistics found when created """
+        data = WeatherData()
+        data.load('weather_data.csv')
+        sp = self.prediction.SophisticatedPrediction(data, 10)
+        methods = ('air_pressure', 'chance_of_rain', 'high_temperature', 'low_temperature',
+                   'humidity', 'cloud_cover', 'wind_speed')
+        expected = [getattr(sp, method)() for method in methods]
+        simple = self.prediction.SimplePrediction(data, 5)
+        data._weather_data.append(TestHighTempEdgeCases.day_high)
+
+        self.aggregate(self.assertEqual, [getattr(sp, method)() for method in methods], expected,
+                       tag='snapshot')
+        self.aggregate(self.assertEqual, (simple.high_temperature(), simple.humidity()), (30.7, 64),
+                       tag='simple_snapshot')
+        self.aggregate(self.assertEqual, simple.forecast(), (1, 30.7, 18.9, 64, 7, 9),
+                       tag='simple_snapshot')
+
+        self.aggregate_tests()
+
+    def test_baseline_values(self):
+        """ test windows found from running totals give the values of summing each window """
+        # forecasts of the models when they summed each window in turn
+        expected = {
+            ('SimplePrediction', 1): (2, 26.8, 20.2, 78, 8, 6),
+            ('SimplePrediction', 2): (1, 29.5, 18.9, 66, 8, 6),
+            ('SimplePrediction', 5): (1, 30.7, 18.9, 64, 7, 9),
+            ('SimplePrediction', 28): (12, 34.8, 18.9, 61, 5, 8),
+            ('SophisticatedPrediction', 1): (2, 26.8, 18.2, 93, 9, 7),
+            ('SophisticatedPrediction', 2): (1, 30.15, 19.55, 52, 8, 8),
+            ('SophisticatedPrediction', 5): (1, 30.64, 19.88, 49, 7, 9),
+            ('SophisticatedPrediction', 10): (1, 32.82, 21.31, 44, 5, 9),
+            ('SophisticatedPrediction', 28): (11, 33.571428571428571, 21.985714285714286, 46, 5, 9),
+        }
+        for (model, n_days), values in expected.items():
+            forecast = getattr(self.prediction, model)(self.data, n_days).forecast()
+            for field, actual, value in zip(forecast._fields, forecast, values):
+                self.aggregate(self.assertAlmostEqual, actual, value, places=12,
+                               tag=f'{model} {n_days} {field}')
+        # one-day windows late in the data are exactly that day's values
+        self.aggregate(self.assertEqual,
+                       self.prediction.SophisticatedPrediction(self.data, 1).high_temperature(), 26.8,
+                       tag='one_day')
+
+        data = WeatherData()
+        for high in (16.5, 24.4, 35.5, 11.8, 45.0):
+            data._weather_data.append(WeatherDataItem(0.0, high, 11.0, 8.0, 60, 10, 20, 'N', 3, 1015.0))
+        sp = self.prediction.SophisticatedPrediction(data, 1)
+        self.aggregate(self.assertEqual, sp.high_temperature(), 45.0, tag='cancellation')
+        self.aggregate(self.assertEqual, self.event_decision.EventDecision(
+            self.event_decision.Event('x', False, False, 12), sp).advisability(), 1.0, tag='advisability')
+
+        self.aggregate_tests()
+
+    def test_online_prediction(self):
+        """ test OnlineSimplePrediction.push matches rebuilding SimplePrediction exactly """
+        items = self.data.get_data(self.data.size())
+        new_days = [TestHighTempEdgeCases.day_low, TestHighTempEdgeCases.day_high] + items
+        for n_days in (1, 4, 40):
+            data = WeatherData()
+            data._weather_data.extend(items[:10])
+            online = self.prediction.OnlineSimplePrediction(data, n_days)
+            for day in new_days:
+                online.push(day)
+                data._weather_data.append(day)
+                expected = self.prediction.SimplePrediction(data, n_days)
+                self.aggregate(self.assertEqual, online.forecast(), expected.forecast(), tag='push')
+                self.aggregate(self.assertEqual, online.get_number_days(), expected.get_number_days(),
+                               tag='get_number_days')
+
+            # the days pushed are not in the data the model was made with
+            stale = WeatherData()
+            stale._weather_data.extend(items[:10])
+            pushed = self.prediction.OnlineSimplePrediction(stale, n_days)
+            for day in new_days:
+                pushed.push(day)
+            self.aggregate(self.assertEqual, pushed.forecast_horizons(7),
+                           expected.forecast_horizons(7), tag='forecast_horizons')
+
+        self.aggregate_tests()
+
+    def test_exponential_smoothing(self):
+        """ test ExponentialSmoothingPrediction fitted in one pass matches pushing each day """
+        items = self.data.get_data(self.data.size())
+        first_day = WeatherData()
+        first_day._weather_data.append(items[0])
+        for n_days in (1, 3, 10):
+            fitted = self.prediction.ExponentialSmoothingPrediction(self.data, n_days)
+            pushed = self.prediction.ExponentialSmoothingPrediction(first_day, n_days)
+            for day in items[1:]:
+                pushed.push(day)
+            for getter in fitted.SMOOTHED_GETTERS:
+                self.aggregate(self.assertAlmostEqual, fitted.calculate_average(getter),
+                               pushed.calculate_average(getter), places=9, tag='push')
+
+        latest = self.prediction.ExponentialSmoothingPrediction(self.data, 1)
+        self.aggregate(self.assertEqual, latest.high_temperature(), items[-1].get_high_temperature(),
+                       tag='high_temperature')
+        self.aggregate(self.assertEqual, latest.humidity(), items[-1].get_humidity(), tag='humidity')
+
+        self.aggregate_tests()
+
+    def test_regression(self):
+        """ test RegressionPrediction recovers a linear relation between days """
+        generator = random.Random(1)
+        data = WeatherData()
+        low_temperature = 20
+        for day in range(60):
+            high_temperature = 2 + 0.5 * low_temperature
+            low_temperature = generator.uniform(10, 25)
+            data._weather_data.append(WeatherDataItem(
+                generator.uniform(0, 5), high_temperature, low_temperature, 10,
+                generator.randint(30, 90), generator.randint(0, 20), 40,
+                generator.choice(['N', 'SE', 'W', '']), generator.randint(0, 8),
+                generator.uniform(1005, 1020)))
+        rp = self.prediction.RegressionPrediction(data, 2)
+
+        self.aggregate(self.assertEqual, rp.get_number_days(), 2, tag='get_number_days')
+        self.aggregate(self.assertAlmostEqual, rp.high_temperature(), 2 + 0.5 * low_temperature,
+                       places=3, tag='high_temperature')
+        version, fitted = self.prediction.RegressionPrediction._fitted[data]
+        self.aggregate(self.assertEqual, version, data.version(), tag='cached')
+        self.aggregate(self.assertIn, 2, fitted, tag='cached')
+
+        self.aggregate_tests()
+
+    def test_indexed_models_reloaded(self):
+        """ test RegressionPrediction and AnalogPrediction fit again when the data changes but not its size """
+        with open('weather_data.csv') as weather_details:
+            lines = weather_details.readlines()
+        handle, weather_file = tempfile.mkstemp(suffix='.csv')
+        os.close(handle)
+        try:
+            with open(weather_file, 'w') as weather_details:
+                weather_details.writelines(lines[:-3])
+            data = ColumnarWeatherData()
+            data.load(weather_file, number_days=20)
+            self.prediction.RegressionPrediction(data, 2).forecast()
+            self.prediction.AnalogPrediction(data, 3).forecast()
+            with open(weather_file, 'a') as weather_details:
+                weather_details.writelines(lines[-3:])
+            data.append_from(weather_file)
+            expected = ColumnarWeatherData()
+            expected.load(weather_file, number_days=20)
+        finally:
+            os.remove(weather_file)
+
+        self.aggregate(self.assertEqual, data.size(), 20, tag='size')
+        self.aggregate(self.assertEqual, self.prediction.RegressionPrediction(data, 2).forecast(),
+                       self.prediction.RegressionPrediction(expected, 2).forecast(), tag='append_from')
+        self.aggregate(self.assertEqual, self.prediction.AnalogPrediction(data, 3).forecast(),
+                       self.prediction.AnalogPrediction(expected, 3).forecast(), tag='append_from')
+
+        self.aggregate_tests()
+
+    def test_forecast_quantiles(self):
+        """ test forecast_quantiles gives ordered quantiles around the forecast """
+        sp = self.prediction.SimplePrediction(self.data, 10)
+        quantiles = sp.forecast_quantiles((0.05, 0.5, 0.95), resamples=2000, seed=1)
+        days = self.data.get_column('temperature_high', 10)
+        spread = max(days) - min(days)
+
+        self.aggregate(self.assertEqual, set(quantiles), set(self.prediction.QUANTILE_FIELDS), tag='fields')
+        for field, values in quantiles.items():
+            self.aggregate(self.assertEqual, values, sorted(values), tag='ordered')
+            if not field.startswith('temperature'):
+                self.aggregate(self.assertGreaterEqual, values[0], 0, tag='non_negative')
+        low, median, high = quantiles['temperature_high']
+        self.aggregate(self.assertLess, abs(median - sp.high_temperature()), spread / 4, tag='median')
+        self.aggregate(self.assertLess, low, median, tag='spread')
+        self.aggregate(self.assertLess, median, high, tag='spread')
+        self.aggregate(self.assertEqual, sp.forecast_quantiles(seed=1), sp.forecast_quantiles(seed=1),
+                       tag='seed')
+
+        yesterday = self.prediction.YesterdaysWeather(self.data)
+        self.aggregate(self.assertEqual, yesterday.forecast_quantiles()['temperature_high'],
+                       [yesterday.high_temperature()] * 3, tag='one_day')
+        # models whose number of days is not limited to the data's size
+        smoothed = self.prediction.ExponentialSmoothingPrediction(self.data, 50)
+        self.aggregate(self.assertEqual, len(smoothed.forecast_quantiles(resamples=100)['rain']), 3,
+                       tag='more_days_than_data')
+
+        self.aggregate_tests()
+
+    def test_forecast_horizons(self):
+        """ test forecast_horizons predicts each day from the days forecast before it """
+        sp = self.prediction.SimplePrediction(self.data, 10)
+        horizons = sp.forecast_horizons(14)
+        items = self.data.get_data(self.data.size())
+        first = horizons[0]
+        extended = WeatherData()
+        extended._weather_data.extend(items)
+        extended._weather_data.append(WeatherDataItem(
+            self.data.window_mean('rain', 10), first.high_temperature, first.low_temperature,
+            self.data.window_mean('sunshine_hours', 10), first.humidity, first.wind_speed,
+            round(self.data.window_mean('wind_speed_max', 10)), items[-1].get_wind_direction(),
+            first.cloud_cover, self.data.window_mean('air_pressure', 10)))
+        second = self.prediction.SimplePrediction(extended, 10).forecast()
+
+        self.aggregate(self.assertEqual, len(horizons), 14, tag='forecast_horizons')
+        self.aggregate(self.assertEqual, first, sp.forecast(), tag='tomorrow')
+        self.aggregate(self.assertEqual, horizons[1].humidity, second.humidity, tag='day_after')
+        self.aggregate(self.assertAlmostEqual, horizons[1].high_temperature, second.high_temperature,
+                       places=9, tag='day_after')
+        self.aggregate(self.assertEqual,
+                       self.prediction.OnlineSimplePrediction(self.data, 10).forecast_horizons(14),
+                       horizons, tag='online')
+        yesterday = self.prediction.YesterdaysWeather(self.data)
+        self.aggregate(self.assertEqual, yesterday.forecast_horizons(3), [yesterday.forecast()] * 3,
+                       tag='yesterday')
+        for model in (self.prediction.SophisticatedPrediction(self.data, 10),
+                      self.prediction.ExponentialSmoothingPrediction(self.data, 5),
+                      self.prediction.RegressionPrediction(self.data, 2),
+                      self.prediction.AnalogPrediction(self.data, 3)):
+            horizons = model.forecast_horizons(5)
+            self.aggregate(self.assertEqual, len(horizons), 5, tag='forecast_horizons')
+            self.aggregate(self.assertEqual, horizons[0], model.forecast(), tag='tomorrow')
+
+        # days added to the data after a model is made do not change its horizons
+        data = WeatherData()
+        data._weather_data.extend(items)
+        models = [self.prediction.SimplePrediction(data, 10),
+                  self.prediction.SophisticatedPrediction(data, 10),
+                  self.prediction.RegressionPrediction(data, 2),
+                  self.prediction.AnalogPrediction(data, 3),
+                  self.prediction.EnsemblePrediction(data, 5)]
+        expected = [model.forecast_horizons(5) for model in models]
+        data._weather_data.append(TestHighTempEdgeCases.day_high)
+        for model, horizons in zip(models, expected):
+            self.aggregate(self.assertEqual, model.forecast_horizons(5), horizons,
+                           tag=f'{type(model).__name__} data_added')
+
+        self.aggregate_tests()
+
+    def test_kd_tree(self):
+        """ test KDTree.nearest finds the same distances as comparing every point """
+        generator = random.Random(2)
+        points = [(generator.randint(0, 9), generator.random(), generator.randint(0, 3))
+                  for _ in range(300)]
+        tree = KDTree(points)
+        for _ in range(30):
+            point = (generator.uniform(0, 9), generator.random(), generator.uniform(0, 3))
+            distances = sorted(sum((a - b) ** 2 for a, b in zip(point, other)) for other in points)
+            nearest = tree.nearest(point, 5)
+            self.aggregate(self.assertEqual,
+                           [sum((a - b) ** 2 for a, b in zip(point, points[index])) for index in nearest],
+                           distances[:5], tag='nearest')
+
+        self.aggregate_tests()
+
+    def test_analog_prediction(self):
+        """ test AnalogPrediction predicts the days after the most similar days """
+        ap = self.prediction.AnalogPrediction(self.data, 3)
+        items = self.data.get_data(self.data.size())
+        features = ('get_air_pressure', 'get_humidity', 'get_cloud_cover', 'get_average_wind_speed')
+        scales = []
+        for getter in features:
+            values = [getattr(item, getter)() for item in items]
+            mean = sum(values) / len(values)
+            scales.append((sum((value - mean) ** 2 for value in values) / len(values)) ** 0.5)
+
+        def distance(item):
+            return sum(((getattr(item, getter)() - getattr(items[-1], getter)()) / scale) ** 2
+                       for getter, scale in zip(features, scales))
+        similar = sorted(range(len(items) - 1), key=lambda day: distance(items[day]))[:3]
+        following = [items[day + 1] for day in similar]
+
+        self.aggregate(self.assertEqual, ap.get_number_days(), 3, tag='get_number_days')
+        self.aggregate(self.assertAlmostEqual, ap.high_temperature(),
+                       sum(item.get_high_temperature() for item in following) / 3, places=9,
+                       tag='high_temperature')
+        self.aggregate(self.assertEqual, ap.chance_of_rain(),
+                       round(100 * sum(item.get_rainfall() >= 0.1 for item in following) / 3),
+                       tag='chance_of_rain')
+
+        self.aggregate_tests()
+
+    def test_batch_forecasts(self):
+        """ test batch forecasts of stacked stations equal each station's model """
+        items = self.data.get_data(self.data.size())
+        station_data = []
+        for days in (items, items[:25], items[-40:], items[:1]):
+            weather_data = WeatherData()
+            weather_data._weather_data.extend(days)
+            station_data.append(weather_data)
+        stack = stations.StationStack.from_weather_data(station_data)
+
+        forecasts = stations.batch_forecasts(stack, stations.YesterdaysWeather)
+        expected = [self.prediction.YesterdaysWeather(data).forecast() for data in station_data]
+        self.aggregate(self.assertEqual, forecasts, expected, tag='YesterdaysWeather')
+        for name in ('SimplePrediction', 'SophisticatedPrediction'):
+            for n_days in (1, 4, 30, 10000):
+                forecasts = stations.batch_forecasts(stack, getattr(stations, name), n_days)
+                expected = [getattr(self.prediction, name)(data, n_days).forecast()
+                            for data in station_data]
+                self.aggregate(self.assertEqual, forecasts, expected, tag=f'{name} {n_days}')
+
+        self.aggregate_tests()
+
+    def test_saved_models(self):
+        """ test models loaded from saved state forecast as the originals did """
+        models = [self.prediction.YesterdaysWeather(self.data),
+                  self.prediction.SimplePrediction(self.data, 5),
+                  self.prediction.SophisticatedPrediction(self.data, 5),
+                  self.prediction.OnlineSimplePrediction(self.data, 5),
+                  self.prediction.ExponentialSmoothingPrediction(self.data, 5),
+                  self.prediction.RegressionPrediction(self.data, 3),
+                  self.prediction.AnalogPrediction(self.data, 4),
+                  self.prediction.EnsemblePrediction(self.data, 5)]
+        item = self.data.get_data(3)[0]
+        handle, model_file = tempfile.mkstemp(suffix='.wxm')
+        os.close(handle)
+        try:
+            for model in models:
+                model.save(model_file)
+                loaded = self.prediction.load_model(model_file)
+                name = type(model).__name__
+                self.aggregate(self.assertEqual, type(loaded).__name__, name, tag=name)
+                self.aggregate(self.assertEqual, loaded.forecast(), model.forecast(), tag=name)
+                if hasattr(model, 'push'):
+                    model.push(item)
+                    loaded.push(item)
+                    self.aggregate(self.assertEqual, loaded.forecast(), model.forecast(),
+                                   tag=f'{name} push')
+            # days added to the data after a model is made are not saved
+            data = WeatherData()
+            data._weather_data.extend(self.data.get_data(self.data.size()))
+            grown = [self.prediction.YesterdaysWeather(data),
+                     self.prediction.SimplePrediction(data, 5),
+                     self.prediction.SophisticatedPrediction(data, 10),
+                     self.prediction.EnsemblePrediction(data, 5)]
+            data._weather_data.append(TestHighTempEdgeCases.day_high)
+            for model in grown:
+                model.save(model_file)
+                self.aggregate(self.assertEqual, self.prediction.load_model(model_file).forecast(),
+                               model.forecast(), tag=f'{type(model).__name__} data_added')
+            # directions are saved with the model, so another table of
+            # directions, as in another process, does not change them
+            windy = WeatherData()
+            windy._weather_data.append(WeatherDataItem(0.0, 30.0, 20.0, 5.0, 50, 10, 20,
+                                                       'Variable', 4, 1010.0))
+            self.prediction.YesterdaysWeather(windy).save(model_file)
+            code = WIND_DIRECTIONS.index('Variable')
+            WIND_DIRECTIONS[code] = 'Other'
+            try:
+                loaded = self.prediction.load_model(model_file)
+            finally:
+                WIND_DIRECTIONS[code] = 'Variable'
+            self.aggregate(self.assertEqual, loaded._yesterdays_weather.get_wind_direction(),
+                           'Variable', tag='wind_direction')
+            with open(model_file, 'wb') as saved:
+                saved.write(b'not a model')
+            self.aggregate(self.assertRaises, ValueError, self.prediction.load_model,
+                           model_file, tag='corrupt')
+        finally:
+            os.remove(model_file)
+
+        self.aggregate_tests()
+
+    def test_forecast_cache(self):
+        """ test cached models are reused until the data changes """
+        data = WeatherData()
+        data._weather_data.extend(self.data.get_data(self.data.size())[:20])
+        cache = self.prediction.ForecastCache(max_size=2)
+        simple = cache.model(self.prediction.SimplePrediction, data, 3)
+        version = data.version()
+
+        self.aggregate(self.assertIs, cache.model(self.prediction.SimplePrediction, data, 3),
+                       simple, tag='reused')
+        self.aggregate(self.assertIsNot, cache.model(self.prediction.SimplePrediction, data, 4),
+                       simple, tag='parameters')
+        self.aggregate(self.assertNotEqual, WeatherData().version(), version, tag='unique')
+        data._weather_data.append(self.data.get_data(1)[0])
+        self.aggregate(self.assertNotEqual, data.version(), version, tag='version')
+        self.aggregate(self.assertEqual,
+                       cache.forecast(self.prediction.SimplePrediction, data, 3),
+                       self.prediction.SimplePrediction(data, 3).forecast(), tag='changed')
+        self.aggregate(self.assertEqual, len(cache), 2, tag='max_size')
+
+        # weights are held in a dictionary of arrays
+        weights = self.prediction.EnsemblePrediction(self.data, 3)._ensemble_weights
+        ensemble = cache.model(self.prediction.EnsemblePrediction, self.data, 3, weights)
+        equal_weights = self.prediction.EnsembleWeights(
+            list(weights.members), {field: array('d', column) for field, column in weights.weights.items()})
+        self.aggregate(self.assertIs,
+                       cache.model(self.prediction.EnsemblePrediction, self.data, 3, equal_weights),
+                       ensemble, tag='ensemble_weights')
+
+        self.aggregate_tests()
+
+
+class TestWeatherDataLoading(TestA2):
+    """ Test loading weather data from files """
+    HEADER = ('Date,Minimum Temperature (C),Maximum Temperature (C),Rainfall (mm),'
+              'Sunshine (hours),Relative Humidity (%),Cloud Cover (oktas),Wind Direction,'
+              'Wind Speed (km/h),Maximum Wind Gust (km/h),MSL Pressure (hPa)\n')
+    ROW = '1/02/2019,22.3,33.3,0,10.1,58,6,N,2,33,1014.7\n'
+
+    def setUp(self):
+        super().setUp()
+        handle, self.weather_file = tempfile.mkstemp(suffix='.csv')
+        os.close(handle)
+
+    def tearDown(self):
+        for name in (self.weather_file, self.weather_file + weather_store.SIDECAR_EXTENSION):
+            if os.path.exists(name):
+                os.remove(name)
+
+    def write(self, text):
+        with open(self.weather_file, 'w') as weather_details:
+            weather_details.write(text)
+
+    def test_quoted_file(self):
+        """ test quoted fields and blank lines are read as by csv.DictReader """
+        self.write(self.HEADER + self.ROW + '\n' + self.ROW.replace(',N,', ',"N",'))
+        data = WeatherData()
+        data.load(self.weather_file)
+
+        self.aggregate(self.assertEqual, data.size(), 2, tag='size')
+        self.aggregate(self.assertEqual, data.get_data(1)[0].get_wind_direction(), 'N',
+                       tag='get_wind_direction')
+
+        self.aggregate_tests()
+
+    def test_malformed_file(self):
+        """ test malformed files are rejected """
+        for text, error in ((self.HEADER.replace('Rainfall', 'Rain') + self.ROW, KeyError),
+                            (self.HEADER + self.ROW + '1/02/2019,22.3,33.3\n', ValueError),
+                            (self.HEADER + self.ROW.replace('58', '5.8'), ValueError)):
+            self.write(text)
+            for data in (WeatherData(), ColumnarWeatherData()):
+                self.aggregate(self.assertRaises, error, data.load, self.weather_file)
+
+        self.aggregate_tests()
+
+    def test_other_date_format(self):
+        """ test files with dates not written as day/month/year load without dates """
+        self.write(self.HEADER + self.ROW.replace('1/02/2019', '2019-02-01'))
+        for data in (WeatherData(), ColumnarWeatherData()):
+            for cache in (False, True, True):
+                data.load(self.weather_file, cache=cache)
+                self.aggregate(self.assertEqual, data.get_data(1)[0].get_air_pressure(), 1014.7,
+                               tag='load')
+                self.aggregate(self.assertRaises, ValueError, data.get_day, date(2019, 2, 1))
+                self.aggregate(self.assertRaises, ValueError, data.get_range,
+                               date(2019, 2, 1), date(2019, 2, 2))
+
+        self.write(self.HEADER + self.ROW)
+        for data in (WeatherData(), ColumnarWeatherData()):
+            data.load(self.weather_file, cache=False)
+            with open(self.weather_file, 'a') as weather_details:
+                weather_details.write(self.ROW.replace('1/02/2019', '2/02/2019'))
+            data.append_from(self.weather_file)
+            self.aggregate(self.assertEqual, data.get_day(date(2019, 2, 2)).get_air_pressure(), 1014.7,
+                           tag='append_from')
+            with open(self.weather_file, 'a') as weather_details:
+                weather_details.write(self.ROW.replace('1/02/2019', '3/02/2019').replace('1014.7', '1020.5'))
+            data.append_from(self.weather_file)
+            self.aggregate(self.assertEqual, data.get_day(date(2019, 2, 3)).get_air_pressure(), 1020.5,
+                           tag='append_from')
+            self.write(self.HEADER + self.ROW)
+
+        self.aggregate_tests()
+
+    def test_sidecar_cache(self):
+        """ test the binary sidecar is used, and replaced when the file changes """
+        sidecar = self.weather_file + weather_store.SIDECAR_EXTENSION
+        self.write(self.HEADER + self.ROW)
+        WeatherData().load(self.weather_file)
+        ColumnarWeatherData().load(self.weather_file)
+        self.aggregate(self.assertFalse, os.path.exists(sidecar), tag='default')
+
+        parsed = WeatherData()
+        parsed.load(self.weather_file, cache=True)
+        self.aggregate(self.assertTrue, os.path.exists(sidecar), tag='cache=True')
+        for data in (WeatherData(), ColumnarWeatherData()):
+            data.load(self.weather_file, cache=True)
+            self.aggregate(self.assertEqual, str(data.get_data(1)[0]), str(parsed.get_data(1)[0]),
+                           tag='cached')
+
+        self.write(self.HEADER + self.ROW + self.ROW.replace('1014.7', '1020.5'))
+        data = WeatherData()
+        data.load(self.weather_file, cache=True)
+        self.aggregate(self.assertEqual, data.get_data(1)[0].get_air_pressure(), 1020.5, tag='invalidated')
+
+        self.aggregate_tests()
+
+    def test_append_from(self):
+        """ test append_from reads only appended days, and reloads rewritten files """
+        self.write(self.HEADER + self.ROW)
+        for data in (WeatherData(), ColumnarWeatherData()):
+            data.load(self.weather_file, cache=False)
+            with open(self.weather_file, 'a') as weather_details:
+                weather_details.write(self.ROW.replace('1014.7', '1016.0'))
+                weather_details.write(self.ROW[:20])
+            self.aggregate(self.assertEqual, data.append_from(self.weather_file), 1, tag='appended')
+            self.aggregate(self.assertEqual, data.get_data(1)[0].get_air_pressure(), 1016.0, tag='appended')
+
+            with open(self.weather_file, 'a') as weather_details:
+                weather_details.write(self.ROW[20:])
+            self.aggregate(self.assertEqual, data.append_from(self.weather_file), 1, tag='completed')
+            self.aggregate(self.assertEqual, data.size(), 3, tag='completed')
+
+            self.write(self.HEADER + self.ROW.replace('1014.7', '1001.0'))
+            self.aggregate(self.assertEqual, data.append_from(self.weather_file), 1, tag='truncated')
+            self.aggregate(self.assertEqual, data.get_data(1)[0].get_air_pressure(), 1001.0, tag='truncated')
+            self.write(self.HEADER + self.ROW)
+
+        self.aggregate_tests()
+
+    def test_append_from_empty(self):
+        """ test append_from loads a file that was empty when first loaded """
+        for data in (WeatherData(), ColumnarWeatherData()):
+            self.write('')
+            data.load(self.weather_file, cache=False)
+            self.aggregate(self.assertEqual, data.size(), 0, tag='empty')
+            self.write(self.HEADER + self.ROW)
+            self.aggregate(self.assertEqual, data.append_from(self.weather_file), 1, tag='header')
+            self.aggregate(self.assertEqual, data.get_data(1)[0].get_air_pressure(), 1014.7, tag='header')
+            with open(self.weather_file, 'a') as weather_details:
+                weather_details.write(self.ROW.replace('1014.7', '1016.0'))
+            self.aggregate(self.assertEqual, data.append_from(self.weather_file), 1, tag='appended')
+            self.aggregate(self.assertEqual, data.size(), 2, tag='appended')
+            version = data.version()
+            self.aggregate(self.assertEqual, data.append_from(self.weather_file), 0, tag='no rows')
+            self.aggregate(self.assertEqual, data.version(), version, tag='no rows')
+
+        self.aggregate_tests()
+
+    def test_iter_file(self):
+        """ test iter_file yields the file's columns in chunks """
+        chunks = list(WeatherData.iter_file('weather_data.csv', chunk_size=10))
+        rain = [value for chunk in chunks for value in chunk['rain']]
+
+        self.aggregate(self.assertEqual, [len(chunk['rain']) for chunk in chunks], [10, 10, 8],
+                       tag='chunk_size')
+        self.aggregate(self.assertEqual, rain, list(self.data.get_column('rain', self.data.size())),
+                       tag='columns')
+
+        self.aggregate_tests()
+
+    def test_reload_same_size(self):
+        """ test loading another file of as many days replaces every column """
+        self.write(self.HEADER + self.ROW)
+        for data in (WeatherData(), ColumnarWeatherData()):
+            data.load(self.weather_file, cache=False)
+            self.aggregate(self.assertEqual, self.prediction.SimplePrediction(data, 1).high_temperature(),
+                           33.3, tag='loaded')
+            self.write(self.HEADER + self.ROW.replace('33.3', '37.1'))
+            data.load(self.weather_file, cache=False)
+            self.aggregate(self.assertEqual, self.prediction.SimplePrediction(data, 1).high_temperature(),
+                           37.1, tag='reloaded')
+            self.aggregate(self.assertEqual, data.window_mean('temperature_high', 1), 37.1,
+                           tag='window_mean')
+            self.write(self.HEADER + self.ROW)
+
+        self.aggregate_tests()
+
+    def test_load_tail(self):
+        """ test ColumnarWeatherData.load keeps only the most recent number_days """
+        data = ColumnarWeatherData()
+        data.load('weather_data.csv', number_days=12)
+
+        self.aggregate(self.assertEqual, data.size(), 12, tag='size')
+        self.aggregate(self.assertEqual, [str(item) for item in data.get_data(12)],
+                       [str(item) for item in self.data.get_data(12)], tag='get_data')
+
+        self.aggregate_tests()
+
+
+class TestBacktest(TestA2):
+    """ Test scoring prediction models against historical weather data """
+    def test_backtest(self):
+        """ test backtest forecasts each day from only the days before it """
+        forecasts = backtest.backtest(self.data, backtest.MODELS[2][1], first_day=20)
+        truncated = WeatherData()
+        truncated._weather_data.extend(self.data.get_data(self.data.size())[:24])
+        expected = self.prediction.SophisticatedPrediction(truncated, backtest.DEFAULT_N_DAYS)
+
+        self.aggregate(self.assertEqual, len(forecasts), self.data.size() - 20, tag='backtest')
+        self.aggregate(self.assertEqual, forecasts[4], expected.forecast(), tag='backtest')
+
+        # window models forecast every day from the rolling windows at once
+        for model_type in (self.prediction.SimplePrediction,
+                           self.prediction.SophisticatedPrediction):
+            rolled = backtest.backtest(self.data, lambda data: model_type(data, 5), first_day=2)
+            rebuilt = [model_type(WeatherDataView(self.data, day), 5).forecast()
+                       for day in range(2, self.data.size())]
+            self.aggregate(self.assertEqual, rolled, rebuilt, tag=f'{model_type.__name__} rolled')
+        # models updated in place are pushed each day rather than made again
+        for model_type in (self.prediction.OnlineSimplePrediction,
+                           self.prediction.ExponentialSmoothingPrediction):
+            pushed = backtest.backtest(self.data, lambda data: model_type(data, 5), first_day=3)
+            for day, forecast in enumerate(pushed, start=3):
+                rebuilt = model_type(WeatherDataView(self.data, day), 5).forecast()
+                for field, actual, value in zip(forecast._fields, forecast, rebuilt):
+                    self.aggregate(self.assertAlmostEqual, actual, value, places=9,
+                                   tag=f'{model_type.__name__} {field}')
+        # regression is fitted again from the pushed normal equations
+        pushed = backtest.backtest(self.data, lambda data: self.prediction.RegressionPrediction(data, 3),
+                                   first_day=5)
+        for day, forecast in enumerate(pushed, start=5):
+            rebuilt = self.prediction.RegressionPrediction(WeatherDataView(self.data, day), 3).forecast()
+            for field, actual, value in zip(forecast._fields, forecast, rebuilt):
+                self.aggregate(self.assertAlmostEqual, actual, value, places=6,
+                               tag=f'RegressionPrediction {field}')
+
+        self.aggregate_tests()
+
+    def test_score(self):
+        """ test score finds the mean absolute and root mean square errors """
+        forecasts = backtest.backtest(self.data, self.prediction.YesterdaysWeather)
+        errors = backtest.score(self.data, forecasts)
+        highs = self.data.get_column('temperature_high', self.data.size())
+        differences = [abs(today - yesterday) for yesterday, today in zip(highs, highs[1:])]
+
+        self.aggregate(self.assertAlmostEqual, errors['high_temperature'][0],
+                       sum(differences) / len(differences), places=9, tag='mae')
+        self.aggregate(self.assertAlmostEqual, errors['high_temperature'][1],
+                       (sum(d * d for d in differences) / len(differences)) ** 0.5, places=9,
+                       tag='rmse')
+        self.aggregate(self.assertEqual, set(errors), set(self.prediction.Forecast._fields),
+                       tag='fields')
+
+        self.aggregate_tests()
+
+    def test_ensemble(self):
+        """ test ensemble weights are fitted, saved and combine the models' forecasts """
+        weights = backtest.fit_ensemble_weights(self.data, 3, first_day=5)
+        handle, weights_file = tempfile.mkstemp(suffix='.wxw')
+        os.close(handle)
+        try:
+            backtest.save_ensemble_weights(weights_file, weights)
+            loaded = self.prediction.load_ensemble_weights(weights_file)
+        finally:
+            os.remove(weights_file)
+        ensemble = self.prediction.EnsemblePrediction(self.data, 3, loaded)
+        members = [self.prediction.YesterdaysWeather(self.data),
+                   self.prediction.SimplePrediction(self.data, 3),
+                   self.prediction.SophisticatedPrediction(self.data, 3)]
+        expected = sum(weight * member.high_temperature() for weight, member
+                       in zip(weights.weights['high_temperature'], members))
+
+        self.aggregate(self.assertEqual, loaded, weights, tag='load_ensemble_weights')
+        for field, field_weights in weights.weights.items():
+            self.aggregate(self.assertAlmostEqual, sum(field_weights), 1.0, tag=field)
+        self.aggregate(self.assertAlmostEqual, ensemble.high_temperature(), expected,
+                       places=9, tag='high_temperature')
+
+        # an ensemble of one model forecasts further ahead just as the model does
+        for name in ('Simple prediction', 'Sophisticated prediction', 'Exponential smoothing',
+                     'Regression', 'Analog'):
+            single = self.prediction.EnsembleWeights((name,), {
+                field: array('d', [1.0]) for field in self.prediction.Forecast._fields})
+            ensemble = self.prediction.EnsemblePrediction(self.data, 3, single)
+            member = self.prediction.EnsemblePrediction.make_member(name, self.data, 3)
+            self.aggregate(self.assertEqual, ensemble.forecast_horizons(4), member.forecast_horizons(4),
+                           tag=f'forecast_horizons {name}')
+
+        self.aggregate_tests()
+
+    def test_sweep(self):
+        """ test sweep writes every combination, ranked by error, from worker processes """
+        with tempfile.TemporaryDirectory() as directory:
+            weather_file = os.path.join(directory, 'weather_data.csv')
+            results_file = os.path.join(directory, 'results.csv')
+            with open('weather_data.csv') as source, open(weather_file, 'w') as copied:
+                copied.write(source.read())
+            rows = sweep.sweep([weather_file], results_file, n_days_options=(2, 5),
+                               model_names=('Simple prediction', 'Sophisticated prediction'),
+                               processes=2)
+            with open(results_file) as results:
+                written = results.read().splitlines()
+            files = sorted(os.listdir(directory))
+        expected = backtest.evaluate(
+            self.data, lambda data: self.prediction.SimplePrediction(data, 2), first_day=5)
+        row = next(row for row in rows if row[2:4] == ['Simple prediction', 2])
+        errors = [row[4 + 2 * position] for position in range(len(self.prediction.Forecast._fields))]
+
+        self.aggregate(self.assertEqual, [row[0] for row in rows], [1, 2, 3, 4], tag='rank')
+        self.aggregate(self.assertEqual, [row[6] for row in rows], sorted(row[6] for row in rows),
+                       tag='rank')
+        self.aggregate(self.assertEqual, len(written), 5, tag='results_file')
+        self.aggregate(self.assertEqual, files, ['results.csv', 'weather_data.csv'], tag='no_sidecar')
+        self.aggregate(self.assertEqual, errors,
+                       [round(expected[field][0], 4) for field in self.prediction.Forecast._fields],
+                       tag='errors')
+
+        self.aggregate_tests()
+
 
 class TestUserInterface(TestA2):
     """ Note this class is not assessed """
@@ -425,6 +1377,11 @@ def main():
         TestFunctionality,
         TestHighTempEdgeCases,
         TestEventDecisionEdgeCases,
+        TestColumnarWeatherData,
+        TestDateIndex,
+        TestWeatherIndexes,
+        TestWeatherDataLoading,
+        TestBacktest,
         TestUserInterface
     ]
 
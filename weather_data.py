@@ -3,7 +3,19 @@
     used in the second assignment for CSSE1001/7030.
 
     WeatherData: Holds data about weather over a period of time.
+    ColumnarWeatherData: WeatherData stored as one typed array per field.
     WeatherDataItem: Record of weather data for a 24 hour period.
+    CompactWeatherDataItem: WeatherDataItem without a per-object __dict__.
+    WeatherDataItemView: WeatherDataItem read from the columns of a
+                         ColumnarWeatherData.
+    WeatherDataView: WeatherData up to a day, shared rather than copied.
+
+    CSV files are parsed a column at a time rather than a row at a time,
+    which loads about 1.3 to 1.8 times as many rows per second as
+    csv.DictReader (see benchmark.py). Making a string and a number for
+    every field bounds how fast text can be parsed in pure Python, so a
+    threefold speed up is only reached by loading with cache=True, which
+    reads a binary copy of the file once it has been parsed.
 """
 
 __author__ = "Richard Thomas"
@@ -12,6 +24,399 @@ __date__ = "24/03/2019"
 __copyright__ = "The University of Queensland, 2019"
 
 import csv
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import date
+from itertools import chain, count, islice, repeat
+from operator import le, truediv
+
+import weather_store
+from weather_index import PrefixSums, SparseTable
+
+
+# Source of the generations of every WeatherData, see WeatherData.version.
+_generations = count()
+
+# 16-wind compass rose directions, or empty string when there was no wind.
+# Columns store a direction as its index in this list; any other direction
+# found in loaded data is appended to it.
+WIND_DIRECTIONS = ["", "N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+                   "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
+
+# Each WeatherDataItem field, in constructor order, with the CSV column it is
+# loaded from, the type it is converted to and the array typecode of its column.
+FIELDS = (
+    ("rain", "Rainfall (mm)", float, "d"),
+    ("temperature_high", "Maximum Temperature (C)", float, "d"),
+    ("temperature_low", "Minimum Temperature (C)", float, "d"),
+    ("sunshine_hours", "Sunshine (hours)", float, "d"),
+    ("humidity", "Relative Humidity (%)", int, "i"),
+    ("wind_speed_average", "Wind Speed (km/h)", int, "i"),
+    ("wind_speed_max", "Maximum Wind Gust (km/h)", int, "i"),
+    ("wind_direction", "Wind Direction", str, "H"),
+    ("cloud_cover", "Cloud Cover (oktas)", int, "i"),
+    ("air_pressure", "MSL Pressure (hPa)", float, "d"),
+)
+
+# Name of the field returned by each WeatherDataItem getter.
+GETTERS = {
+    "get_rainfall": "rain",
+    "get_high_temperature": "temperature_high",
+    "get_low_temperature": "temperature_low",
+    "get_sunshine_hours": "sunshine_hours",
+    "get_humidity": "humidity",
+    "get_average_wind_speed": "wind_speed_average",
+    "get_maximum_wind_speed": "wind_speed_max",
+    "get_wind_direction": "wind_direction",
+    "get_cloud_cover": "cloud_cover",
+    "get_air_pressure": "air_pressure",
+}
+
+# Column holding the date of each day, loaded from the CSV column of dates
+# written as day/month/year. The dates are kept as written, in a list, until
+# first used, then as an array of proleptic Gregorian ordinals.
+DATE_COLUMN = "date"
+_DATE_HEADING = "Date"
+
+_FIELD_NAMES = tuple(field for field, _, _, _ in FIELDS)
+_COLUMN_NAMES = _FIELD_NAMES + (DATE_COLUMN,)
+_FIELD_GETTERS = {field: getter for getter, field in GETTERS.items()}
+_DIRECTION_INDEX = _FIELD_NAMES.index("wind_direction")
+_DIRECTION_CODES = {direction: code
+                    for code, direction in enumerate(WIND_DIRECTIONS)}
+
+
+def _direction_code(direction):
+    """(int) Index of a wind direction in WIND_DIRECTIONS, adding it if new."""
+    code = _DIRECTION_CODES.get(direction)
+    if code is None:
+        code = len(WIND_DIRECTIONS)
+        WIND_DIRECTIONS.append(direction)
+        _DIRECTION_CODES[direction] = code
+    return code
+
+
+def _parsed_dates(dates):
+    """Converts a date column into date ordinals, if not already converted.
+
+    Parameters:
+        dates (list[str] or array): Dates written as day/month/year,
+                                    e.g. 1/02/2019, or their ordinals.
+
+    Return:
+        (array) Proleptic Gregorian ordinal of each date, or None if a date
+                is not written as day/month/year.
+    """
+    if not isinstance(dates, list):
+        return dates
+    if dates and set(map(str.count, dates, repeat("/"))) != {2}:
+        return None
+    parts = "/".join(dates).split("/") if dates else []
+    try:
+        days = list(map(date, map(int, parts[2::3]), map(int, parts[1::3]),
+                        map(int, parts[0::3])))
+    except ValueError:
+        return None
+    return array("i", map(date.toordinal, days))
+
+
+def _joined_dates(dates, new_dates):
+    """Adds dates after those of a date column.
+
+    Parameters:
+        dates (list[str] or array): Date column to add to, which may be
+                                    extended in place.
+        new_dates (list[str] or array): Dates to add.
+
+    Return:
+        (list[str] or array) The joined date column, which is empty if
+                             either column's dates cannot be converted.
+    """
+    if isinstance(dates, list) != isinstance(new_dates, list):
+        dates, new_dates = _parsed_dates(dates), _parsed_dates(new_dates)
+        if dates is None or new_dates is None:
+            return array("i")
+    dates.extend(new_dates)
+    return dates
+
+
+def _stored_columns(columns):
+    """Converts columns to be written to a file of columns.
+
+    Parameters:
+        columns (dict): Maps each field name, and DATE_COLUMN, to a column.
+
+    Return:
+        (dict) The columns, with the dates converted to ordinals, or left out
+               if they cannot be converted or are not known for every day.
+    """
+    dates = _parsed_dates(columns[DATE_COLUMN])
+    columns[DATE_COLUMN] = array("i") if dates is None else dates
+    if len(columns[DATE_COLUMN]) == len(columns["rain"]):
+        return columns
+    return {field: column for field, column in columns.items()
+            if field != DATE_COLUMN}
+
+
+def _empty_columns():
+    """(dict) Maps each field name to an empty array, and DATE_COLUMN to an
+    empty list."""
+    columns = {field: array(typecode) for field, _, _, typecode in FIELDS}
+    columns[DATE_COLUMN] = []
+    return columns
+
+
+def _column_positions(header):
+    """Finds the position of each field's column in a CSV header row.
+
+    Parameters:
+        header (list[str]): Column headings of a weather data CSV file.
+
+    Return:
+        (list[int]) Position of the column for each field, in FIELDS order,
+                    followed by the position of the dates or None if the
+                    file has no dates.
+
+    Raises:
+        KeyError: If the header is missing a field's column.
+    """
+    positions = {heading: position for position, heading in enumerate(header)}
+    return ([positions[heading] for _, heading, _, _ in FIELDS]
+            + [positions.get(_DATE_HEADING)])
+
+
+def _split_rows(lines, width):
+    """Splits lines of a CSV file into a column of strings per position.
+
+    A faster alternative to csv.reader, for files without quoted fields.
+
+    Parameters:
+        lines (list[str]): Lines of the file, excluding the header.
+        width (int): Number of fields in each row.
+
+    Return:
+        (list[list[str]]) Column of field strings for each position, or None
+                          if a line is quoted or does not have width fields.
+    """
+    if set(map(str.count, lines, repeat(","))) != {width - 1}:
+        return None
+    joined = ",".join(lines)
+    if '"' in joined:
+        return None
+    fields = joined.split(",")
+    return [fields[position::width] for position in range(width)]
+
+
+def _parse_columns(raw_columns, positions):
+    """Converts columns of strings from a weather data CSV file.
+
+    Parameters:
+        raw_columns (list[list[str]]): Column of field strings for each position.
+        positions (list[int]): Column position of each field and of the dates,
+                               as returned by _column_positions.
+
+    Return:
+        (dict) Maps each field name to an array of its converted values,
+               and DATE_COLUMN to a list of the dates as written, which is
+               empty if there are no dates. Wind directions are converted
+               to indices into WIND_DIRECTIONS.
+
+    Raises:
+        ValueError: If a value cannot be converted.
+    """
+    columns = {}
+    for (field, _, convert, typecode), position in zip(FIELDS, positions):
+        raw = raw_columns[position]
+        if convert is str:
+            for direction in set(raw).difference(_DIRECTION_CODES):
+                _direction_code(direction)
+            convert = _DIRECTION_CODES.__getitem__
+        columns[field] = array(typecode, map(convert, raw))
+    date_position = positions[-1]
+    # Dates are only converted when first used, see WeatherData._column.
+    columns[DATE_COLUMN] = ([] if date_position is None
+                            else list(raw_columns[date_position]))
+    return columns
+
+
+def _parse_rows(rows, positions):
+    """Converts rows of a weather data CSV file into a column per field.
+
+    Parameters:
+        rows (list[list[str]]): Rows of fields read by a csv.reader.
+        positions (list[int]): Column position of each field in a row.
+
+    Return:
+        (dict) Maps each field name to an array of its converted values.
+
+    Raises:
+        ValueError: If a row is too short or a value cannot be converted.
+    """
+    if not rows:
+        return _empty_columns()
+    width = max(position for position in positions if position is not None) + 1
+    if min(map(len, rows)) < width:
+        row = next(row for row in rows if len(row) < width)
+        raise ValueError(f"Expected at least {width} fields in row: {row}")
+    # Transpose once, then convert each whole column at a time.
+    return _parse_columns(list(zip(*rows)), positions)
+
+
+def _parse_lines(lines, header):
+    """Converts lines of a weather data CSV file into a column per field.
+
+    Column positions are resolved once from the header, then each column is
+    converted in bulk rather than building a dict for every row.
+
+    Parameters:
+        lines (list[str]): Lines of the file, excluding the header.
+        header (list[str]): Column headings of the file.
+
+    Return:
+        (dict) Maps each field name to an array of its values,
+               ordered as in the file.
+
+    Raises:
+        KeyError: If the header is missing a column.
+        ValueError: If a row is too short or a value cannot be converted.
+    """
+    positions = _column_positions(header)
+    raw_columns = _split_rows(lines, len(header))
+    if raw_columns is not None:
+        return _parse_columns(raw_columns, positions)
+    # Blank lines are skipped, as by csv.DictReader.
+    rows = [row for row in csv.reader(lines) if row]
+    return _parse_rows(rows, positions)
+
+
+def _read_header(contents):
+    """(list[str]) Column headings in the first line of a CSV file's contents."""
+    end = contents.find(b"\n")
+    first_line = contents[:end] if end >= 0 else contents
+    return next(csv.reader([first_line.decode("utf-8")]), [])
+
+
+def _recode_directions(columns, directions):
+    """Converts wind direction codes into indices into WIND_DIRECTIONS.
+
+    Parameters:
+        columns (dict): Columns whose wind_direction codes are indices
+                        into directions.
+        directions (list[str]): Table of directions the codes refer to.
+
+    Return:
+        (dict) The columns, with wind_direction recoded if required.
+    """
+    codes = [_direction_code(direction) for direction in directions]
+    if codes != list(range(len(codes))):
+        column = columns["wind_direction"]
+        columns["wind_direction"] = array(column.typecode,
+                                          map(codes.__getitem__, column))
+    return columns
+
+
+# Where a CSV file was read up to, so append_from can read only what follows.
+# tail holds the bytes before offset, to detect the file being rewritten.
+_SourceState = namedtuple("_SourceState",
+                          ("device", "inode", "offset", "tail", "header"))
+_TAIL_SIZE = 256
+
+
+def _load_columns(weather_file, cache):
+    """Reads a weather data CSV file, using its binary sidecar when current.
+
+    The sidecar is keyed on the file's path, size, modification time and
+    content hash, so it is ignored and rewritten whenever the file changes.
+
+    Parameters:
+        weather_file (str): Name of the CSV file containing the weather data.
+        cache (bool): Whether to read and write the sidecar.
+
+    Return:
+        (tuple<dict, _SourceState>) Maps each field name to an array of its
+            values, and where the file was read up to.
+    """
+    with open(weather_file, "rb") as weather_details:
+        contents = weather_details.read()
+        status = os.fstat(weather_details.fileno())
+    header = _read_header(contents)
+    source = _SourceState(status.st_dev, status.st_ino, len(contents),
+                          contents[(-1 * _TAIL_SIZE):], header)
+    if not header:
+        return _empty_columns(), source
+    if cache:
+        key = weather_store.source_key(weather_file, contents)
+        sidecar = weather_store.sidecar_path(weather_file)
+        try:
+            columns, directions = weather_store.read_columns(sidecar, key)
+            if set(_FIELD_NAMES) <= set(columns) <= set(_COLUMN_NAMES):
+                columns.setdefault(DATE_COLUMN, array("i"))
+                return _recode_directions(columns, directions), source
+        except (OSError, ValueError):
+            pass
+    columns = _parse_lines(contents.decode("utf-8").splitlines()[1:], header)
+    if cache:
+        try:
+            weather_store.write_columns(sidecar, _stored_columns(columns),
+                                        WIND_DIRECTIONS, key)
+        except OSError:
+            # The sidecar only saves time, so a read-only directory is not
+            # an error.
+            pass
+    return columns, source
+
+
+def _read_appended(weather_file, source):
+    """Reads the lines appended to a CSV file since it was last read.
+
+    Only complete lines are read; a line still being written is left
+    for the next call.
+
+    Parameters:
+        weather_file (str): Name of the CSV file.
+        source (_SourceState): Where the file was last read up to.
+
+    Return:
+        (tuple<list[str], _SourceState>) The appended lines and where the
+            file has now been read up to, or None if the file has been
+            truncated, replaced or rewritten since it was last read.
+    """
+    with open(weather_file, "rb") as weather_details:
+        status = os.fstat(weather_details.fileno())
+        if ((status.st_dev, status.st_ino) != (source.device, source.inode)
+                or status.st_size < source.offset):
+            return None
+        weather_details.seek(source.offset - len(source.tail))
+        if weather_details.read(len(source.tail)) != source.tail:
+            return None
+        appended = weather_details.read()
+    if (source.tail and not source.tail.endswith(b"\n") and appended
+            and not appended.startswith((b"\n", b"\r\n"))):
+        # The last line read had no line ending, and has since been extended.
+        return None
+    complete = appended[:appended.rfind(b"\n") + 1]
+    source = source._replace(offset=source.offset + len(complete),
+                             tail=(source.tail + complete)[(-1 * _TAIL_SIZE):])
+    lines = [line for line in complete.decode("utf-8").splitlines() if line]
+    return lines, source
+
+
+def _items(columns, item_type):
+    """Builds a data item for each day held in columns.
+
+    Parameters:
+        columns (dict): Maps each field name to a column of values.
+        item_type (type): WeatherDataItem or CompactWeatherDataItem.
+
+    Return:
+        (list) Item for each day, ordered as in the columns.
+    """
+    values = [columns[field] for field in _FIELD_NAMES]
+    values[_DIRECTION_INDEX] = [WIND_DIRECTIONS[code]
+                                for code in values[_DIRECTION_INDEX]]
+    return list(map(item_type, *values))
 
 
 class WeatherDataItem(object):
@@ -103,40 +508,145 @@ class WeatherDataItem(object):
                 )
 
 
+class CompactWeatherDataItem(object):
+    """Record of weather data for a 24 hour period, stored in __slots__.
+
+    Shares the constructor and getters of WeatherDataItem, but has no
+    per-object __dict__. On Python 3.11, which already stores attributes
+    inline, this saves about 30% of each record's memory, and more once an
+    item's __dict__ is built or on earlier versions. To hold days in well
+    under half the memory, use ColumnarWeatherData, which stores each field
+    as a typed array and makes records only when they are asked for.
+    """
+
+    __slots__ = ("_rain", "_temperature_high", "_temperature_low",
+                 "_sunshine_hours", "_humidity", "_wind_speed_average",
+                 "_wind_speed_max", "_wind_direction", "_cloud_cover",
+                 "_air_pressure")
+
+    __init__ = WeatherDataItem.__init__
+    get_rainfall = WeatherDataItem.get_rainfall
+    get_high_temperature = WeatherDataItem.get_high_temperature
+    get_low_temperature = WeatherDataItem.get_low_temperature
+    get_sunshine_hours = WeatherDataItem.get_sunshine_hours
+    get_humidity = WeatherDataItem.get_humidity
+    get_average_wind_speed = WeatherDataItem.get_average_wind_speed
+    get_maximum_wind_speed = WeatherDataItem.get_maximum_wind_speed
+    get_wind_direction = WeatherDataItem.get_wind_direction
+    get_cloud_cover = WeatherDataItem.get_cloud_cover
+    get_air_pressure = WeatherDataItem.get_air_pressure
+    __str__ = WeatherDataItem.__str__
+
+
+class WeatherDataItemView(object):
+    """Record of weather data for a 24 hour period, read from columns.
+
+    Holds only a reference to the columns and the day's position in them,
+    so creating one copies no data.
+    """
+
+    __slots__ = ("_columns", "_day")
+
+    def __init__(self, columns, day):
+        """
+        Parameters:
+            columns (dict): Maps each field name to a column of values.
+            day (int): Position of the day in each column.
+        """
+        self._columns = columns
+        self._day = day
+
+    def get_rainfall(self):
+        """(float) Amount of rainfall (mm)."""
+        return self._columns["rain"][self._day]
+
+    def get_high_temperature(self):
+        """(float) Maximum temperature (C)."""
+        return self._columns["temperature_high"][self._day]
+
+    def get_low_temperature(self):
+        """(float) Minimum temperature (C)."""
+        return self._columns["temperature_low"][self._day]
+
+    def get_sunshine_hours(self):
+        """(float) Number of hours of sunshine."""
+        return self._columns["sunshine_hours"][self._day]
+
+    def get_humidity(self):
+        """(int) Relative humidity (%)."""
+        return self._columns["humidity"][self._day]
+
+    def get_average_wind_speed(self):
+        """(int) Average wind speed (km/h)."""
+        return self._columns["wind_speed_average"][self._day]
+
+    def get_maximum_wind_speed(self):
+        """Maximum gust of wind speed (km/h)."""
+        return self._columns["wind_speed_max"][self._day]
+
+    def get_wind_direction(self):
+        """(str) 16-wind compass rose directions."""
+        return WIND_DIRECTIONS[self._columns["wind_direction"][self._day]]
+
+    def get_cloud_cover(self):
+        """(int) Scale of 0 to 9 (oktas),"""
+        return self._columns["cloud_cover"][self._day]
+
+    def get_air_pressure(self):
+        """(float) Mean sea level air pressure (hPa)."""
+        return self._columns["air_pressure"][self._day]
+
+    __str__ = WeatherDataItem.__str__
+
+
 class WeatherData(object):
     """Collection of weather data over a period of time."""
 
-    def __init__(self):
+    def __init__(self, compact=False):
         """
+        Parameters:
+            compact (bool): Store each day loaded from file as a
+                            CompactWeatherDataItem rather than a WeatherDataItem.
         """
         self._weather_data = []
+        self._item_type = CompactWeatherDataItem if compact else WeatherDataItem
+        # Columns derived from self._weather_data, see _sync_columns.
+        self._columns = None
+        self._synced = 0
+        # Where the loaded file was read up to, see append_from.
+        self._source = None
+        # Date column and how many of its dates are known to be in order.
+        self._dates_checked = (None, 0)
+        # Maps a field name to the PrefixSums of its column.
+        self._prefix_sums = {}
+        # Maps a field name and max or min to the SparseTable of its column.
+        self._sparse_tables = {}
+        # Replaced whenever days are loaded or added, see version.
+        self._generation = next(_generations)
 
-    def load(self, weather_file) :
+    def load(self, weather_file, cache=False) :
         """Loads a fresh set of weather data from a CSV file.
 
         Parameters:
             weather_file (str): Name of the CSV file containing the weather data.
+            cache (bool): Whether to use a binary copy of the file's data,
+                          saved alongside it, instead of parsing the file
+                          again while the file is unchanged. Off by default,
+                          so nothing is written beside the file unless asked.
 
         Pre-condition:
             weather_file != ""
             weather_file is CSV file containing the accessed columns.
         """
+        columns, self._source = _load_columns(weather_file, cache)
+        self._generation = next(_generations)
         self._weather_data.clear()
-        with open(weather_file) as weather_details :
-            file_reader = csv.DictReader(weather_details)
-
-            for row in file_reader:
-                self._weather_data.append(
-                    WeatherDataItem(float(row["Rainfall (mm)"]),
-                                    float(row["Maximum Temperature (C)"]),
-                                    float(row["Minimum Temperature (C)"]),
-                                    float(row["Sunshine (hours)"]),
-                                    int(row["Relative Humidity (%)"]),
-                                    int(row["Wind Speed (km/h)"]),
-                                    int(row["Maximum Wind Gust (km/h)"]),
-                                    row["Wind Direction"],
-                                    int(row["Cloud Cover (oktas)"]),
-                                    float(row["MSL Pressure (hPa)"])))
+        self._weather_data.extend(_items(columns, self._item_type))
+        # The parsed columns are already in sync with the items, and replace
+        # the columns of any earlier file, even one with as many days.
+        self._columns = columns
+        self._synced = len(self._weather_data)
+        self._forget_indexes()
 
     def get_data(self, number_days):
         """Returns a specified number of days of weather data.
@@ -154,8 +664,20 @@ class WeatherData(object):
             [WeatherDataItem] List of WeatherDataItem objects,
                               ordered from oldest to most recent.
         """
+        return self._get_data(number_days, self.size())
+
+    def _get_data(self, number_days, end):
+        """Returns the days of weather data before a position.
+
+        Parameters:
+            number_days (int): Number of days of data to retrieve.
+            end (int): Position after the most recent day to retrieve.
+
+        Return:
+            (list) Items ordered from oldest to most recent.
+        """
         # Slice list number_days from end to end.
-        return self._weather_data[(-1 * number_days):]
+        return self._weather_data[max(end - number_days, 0):end]
 
     def size(self):
         """(int) Returns the number of days of weather data available,
@@ -163,6 +685,769 @@ class WeatherData(object):
                  Returns 0 if no data is available."""
         return len(self._weather_data)
 
+    def version(self):
+        """Returns a token identifying the current contents of the data.
+
+        The generation is shared by no other WeatherData, and is replaced
+        whenever days are loaded or added by the methods of this class, so
+        the token can key results found from the data.
+
+        Return:
+            (tuple<int, int>) Generation and number of days of the data.
+        """
+        return self._generation, self.size()
+
+    def snapshot(self):
+        """Returns the weather data as it is now, without copying it.
+
+        Days added later are not in the snapshot, and if the data is loaded
+        again or days are removed from it, the snapshot keeps the columns it
+        was taken of, so it never changes.
+
+        Return:
+            (WeatherDataView) View of every day of the data.
+        """
+        self._sync_columns()
+        return WeatherDataView(self, self.size(), self._columns)
+
+    def append_from(self, weather_file):
+        """Adds the days appended to a CSV file since it was loaded.
+
+        Only the bytes after those already read are parsed, so keeping the
+        data up to date costs time in proportion to the number of new days.
+        If the file was not loaded, had no header when it was loaded, or has
+        since been truncated, replaced or rewritten, it is loaded again in full.
+
+        Parameters:
+            weather_file (str): Name of the CSV file that was loaded.
+
+        Return:
+            (int) Number of days added, or the number of days available
+                  if the file was loaded again.
+        """
+        appended = None
+        if self._source is not None and self._source.header:
+            appended = _read_appended(weather_file, self._source)
+        if appended is None:
+            self._reload(weather_file)
+            return self.size()
+        lines, source = appended
+        columns = _parse_lines(lines, source.header)
+        self._extend(columns)
+        self._source = source
+        return len(columns["rain"])
+
+    def _reload(self, weather_file):
+        """Loads a CSV file again, as it was first loaded."""
+        self.load(weather_file)
+
+    def _extend(self, columns):
+        """Adds the days held in columns after the most recent day.
+
+        Parameters:
+            columns (dict): Maps each field name to a column of values.
+        """
+        if not len(columns["rain"]):
+            # nothing is added, so the data keeps its version
+            return
+        in_sync = (self._columns is not None
+                   and self._synced == len(self._weather_data))
+        self._generation = next(_generations)
+        self._weather_data.extend(_items(columns, self._item_type))
+        if in_sync:
+            for field in _FIELD_NAMES:
+                self._columns[field].extend(columns[field])
+            self._columns[DATE_COLUMN] = _joined_dates(
+                self._columns[DATE_COLUMN], columns[DATE_COLUMN])
+            self._synced = len(self._weather_data)
+
+    @staticmethod
+    def iter_file(weather_file, chunk_size=10000):
+        """Reads a weather data CSV file lazily, a chunk of days at a time.
+
+        Only one chunk is held in memory, so files of any size can be
+        aggregated. Columns are mapped and converted as by load.
+
+        Parameters:
+            weather_file (str): Name of the CSV file containing the weather data.
+            chunk_size (int): Maximum number of rows read into each chunk.
+
+        Pre-condition:
+            chunk_size > 0
+
+        Yield:
+            (dict) Maps each field name to an array of its values for the
+                   next chunk_size days, ordered as in the file, and
+                   DATE_COLUMN to a list of their dates as written.
+        """
+        with open(weather_file, newline="") as weather_details:
+            file_reader = csv.reader(weather_details)
+            header = next(file_reader, None)
+            if header is None:
+                return
+            positions = _column_positions(header)
+            for chunk in iter(lambda: list(islice(file_reader, chunk_size)), []):
+                # Blank lines are skipped, as by csv.DictReader.
+                rows = [row for row in chunk if row]
+                if rows:
+                    yield _parse_rows(rows, positions)
+
+    def get_column(self, field, number_days):
+        """Returns one field of a specified number of days of weather data.
+
+        Parameters:
+            field (str): Name of a field in FIELDS, e.g. "rain".
+            number_days (int): Number of days of data to retrieve,
+                               counting backwards from the most recent data item.
+
+        Pre-condition:
+            0 < number_days <= size()
+
+        Return:
+            (array) Values of the field, ordered from oldest to most recent.
+                    Wind directions are indices into WIND_DIRECTIONS.
+        """
+        return self._get_column(field, number_days, self.size())
+
+    def _get_column(self, field, number_days, end):
+        """Returns one field of the days of weather data before a position.
+
+        Parameters:
+            field (str): Name of a field in FIELDS, or DATE_COLUMN.
+            number_days (int): Number of days of data to retrieve.
+            end (int): Position after the most recent day to retrieve.
+
+        Return:
+            (array) Values of the field, ordered from oldest to most recent.
+        """
+        return self._column(field)[max(end - number_days, 0):end]
+
+    def window_mean(self, field, number_days):
+        """Returns the mean of one field over a specified number of days.
+
+        Running totals of the field are kept as days are added, so the mean
+        takes the same time to find for any number of days.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS, e.g. "rain".
+            number_days (int): Number of days of data to average,
+                               counting backwards from the most recent data item.
+
+        Pre-condition:
+            0 < number_days <= size()
+
+        Return:
+            (float) Mean of the field over the days.
+        """
+        return self._window_mean(field, number_days, self.size())
+
+    def _window_mean(self, field, number_days, end):
+        """Returns the mean of one field over the days before a position.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS.
+            number_days (int): Number of days of data to average.
+            end (int): Position after the most recent day to average.
+
+        Return:
+            (float) Mean of the field over the days.
+        """
+        start = max(end - number_days, 0)
+        return self._indexed_sums(field).window_sum(start, end) / (end - start)
+
+    def _indexed_sums(self, field):
+        """(PrefixSums) Running totals of a field, brought up to date."""
+        column = self._column(field)
+        prefix_sums = self._prefix_sums.get(field)
+        if prefix_sums is None or not prefix_sums.update(column):
+            prefix_sums = self._prefix_sums[field] = PrefixSums(column)
+        return prefix_sums
+
+    def window_max(self, field, number_days):
+        """Returns the maximum of one field over a specified number of days.
+
+        A sparse table of the field is kept as days are added, so the
+        maximum takes the same time to find for any number of days.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS, e.g. "rain".
+            number_days (int): Number of days of data to search,
+                               counting backwards from the most recent data item.
+
+        Pre-condition:
+            0 < number_days <= size()
+
+        Return:
+            Largest value of the field over the days.
+        """
+        return self._window_extreme(field, number_days, self.size(), max)
+
+    def window_min(self, field, number_days):
+        """Returns the minimum of one field over a specified number of days.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS, e.g. "rain".
+            number_days (int): Number of days of data to search,
+                               counting backwards from the most recent data item.
+
+        Pre-condition:
+            0 < number_days <= size()
+
+        Return:
+            Smallest value of the field over the days.
+        """
+        return self._window_extreme(field, number_days, self.size(), min)
+
+    def _window_extreme(self, field, number_days, end, choose):
+        """Returns the maximum or minimum of one field before a position.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS.
+            number_days (int): Number of days of data to search.
+            end (int): Position after the most recent day to search.
+            choose (function): max or min.
+
+        Return:
+            Most extreme value of the field over the days.
+        """
+        return self._indexed_extremes(field, choose).window_extreme(
+            max(end - number_days, 0), end)
+
+    def _indexed_extremes(self, field, choose):
+        """(SparseTable) Maxima or minima of a field, brought up to date."""
+        column = self._column(field)
+        sparse_table = self._sparse_tables.get((field, choose))
+        if sparse_table is None or not sparse_table.update(column):
+            sparse_table = SparseTable(column, choose)
+            self._sparse_tables[(field, choose)] = sparse_table
+        return sparse_table
+
+    def rolling_mean(self, field, number_days):
+        """Returns the mean of one field over the days up to each day.
+
+        Every window is found at once from the running totals window_mean
+        uses, so forecasting each day of the history does not need a query,
+        or a view, per day.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS, e.g. "rain".
+            number_days (int): Number of days in each window, or every day up
+                               to a day for the first number_days - 1 days.
+
+        Pre-condition:
+            number_days > 0
+
+        Return:
+            (list[float]) Mean of the field over the window ending at each
+                          day, oldest first, equal to window_mean's.
+        """
+        return self._rolling_mean(field, number_days, self.size())
+
+    def _rolling_mean(self, field, number_days, end):
+        """Returns the mean of one field over the days up to each day before
+        a position, see rolling_mean."""
+        sums = self._indexed_sums(field).window_sums(number_days, end)
+        return list(map(truediv, sums,
+                        chain(range(1, min(number_days - 1, end) + 1),
+                              repeat(number_days, max(end + 1 - number_days,
+                                                      0)))))
+
+    def rolling_max(self, field, number_days):
+        """Returns the maximum of one field over the days up to each day.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS, e.g. "rain".
+            number_days (int): Number of days in each window, or every day up
+                               to a day for the first number_days - 1 days.
+
+        Pre-condition:
+            number_days > 0
+
+        Return:
+            (list) Largest value of the field over the window ending at each
+                   day, oldest first.
+        """
+        return self._indexed_extremes(field, max).window_extremes(
+            number_days, self.size())
+
+    def rolling_min(self, field, number_days):
+        """Returns the minimum of one field over the days up to each day.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS, e.g. "rain".
+            number_days (int): Number of days in each window, or every day up
+                               to a day for the first number_days - 1 days.
+
+        Pre-condition:
+            number_days > 0
+
+        Return:
+            (list) Smallest value of the field over the window ending at each
+                   day, oldest first.
+        """
+        return self._indexed_extremes(field, min).window_extremes(
+            number_days, self.size())
+
+    def get_day(self, day):
+        """Returns the weather data of a date.
+
+        Parameters:
+            day (datetime.date): Date of the data to retrieve.
+
+        Return:
+            (WeatherDataItem) Weather data of the day.
+
+        Raises:
+            KeyError: If there is no data for day.
+            ValueError: If the data does not have dates in order.
+        """
+        dates = self._dates()
+        position = bisect_left(dates, day.toordinal())
+        if position == len(dates) or dates[position] != day.toordinal():
+            raise KeyError(day)
+        return self._get_data(1, position + 1)[0]
+
+    def get_range(self, start, end):
+        """Returns the weather data of the days between two dates.
+
+        Parameters:
+            start (datetime.date): Date of the first day to retrieve.
+            end (datetime.date): Date of the last day to retrieve.
+
+        Return:
+            [WeatherDataItem] Items for each day from start to end inclusive
+                              that there is data for, ordered by date.
+
+        Raises:
+            ValueError: If the data does not have dates in order.
+        """
+        dates = self._dates()
+        first = bisect_left(dates, start.toordinal())
+        after = bisect_right(dates, end.toordinal())
+        return self._get_data(after - first, after) if after > first else []
+
+    def as_of(self, day):
+        """Returns the weather data known on a date, without copying it.
+
+        Prediction models given the result forecast the day after day.
+
+        Parameters:
+            day (datetime.date): Date of the most recent day to include.
+
+        Return:
+            (WeatherDataView) Data of each day up to and including day.
+
+        Raises:
+            ValueError: If the data does not have dates in order.
+        """
+        return WeatherDataView(self, bisect_right(self._dates(), day.toordinal()))
+
+    def _dates(self):
+        """Returns the date of each day, after checking they are in order.
+
+        Return:
+            (array) Ordinal of the date of each day, oldest first.
+
+        Raises:
+            ValueError: If any day's date is unknown or out of order.
+        """
+        dates = self._column(DATE_COLUMN)
+        if len(dates) != self.size():
+            raise ValueError("The date of each day of weather data is not known")
+        # Only days added since the last check need to be checked.
+        checked_column, checked = self._dates_checked
+        if checked_column is not dates or checked > len(dates):
+            checked = 0
+        if not all(map(le, islice(dates, max(checked - 1, 0), None),
+                       islice(dates, max(checked, 1), None))):
+            raise ValueError("Weather data is not in date order")
+        self._dates_checked = (dates, len(dates))
+        return dates
+
+    def _holds(self, columns):
+        """(bool) Whether columns are this data's columns, which may since
+        have been extended."""
+        current = self._columns
+        return current is columns or (
+            current is not None
+            and all(current[field] is columns[field] for field in _FIELD_NAMES))
+
+    def _forget_indexes(self):
+        """Drops the indexes of the columns, after they have been replaced."""
+        self._dates_checked = (None, 0)
+        self._prefix_sums.clear()
+        self._sparse_tables.clear()
+
+    def _column(self, field):
+        """(array) Every value of a field, ordered from oldest to most recent."""
+        self._sync_columns()
+        column = self._columns[field]
+        if isinstance(column, list):
+            # Dates are converted on first use, so loading does not pay for
+            # them, and dates that cannot be converted are not known.
+            column = _parsed_dates(column)
+            if column is None:
+                column = array("i")
+            self._columns[field] = column
+        return column
+
+    def _sync_columns(self):
+        """Brings the column of each field up to date with the data items.
+
+        Items appended since the last call are added to the columns;
+        if items have been removed the columns are rebuilt.
+        Dates are only known for items loaded from file.
+        """
+        if self._columns is None or self._synced > len(self._weather_data):
+            self._columns = _empty_columns()
+            self._synced = 0
+        new_items = self._weather_data[self._synced:]
+        if not new_items:
+            return
+        for field in _FIELD_NAMES:
+            column = self._columns[field]
+            values = (getattr(item, _FIELD_GETTERS[field])()
+                      for item in new_items)
+            if field == "wind_direction":
+                values = map(_direction_code, values)
+            column.extend(values)
+        self._synced = len(self._weather_data)
+
+
+class ColumnarWeatherData(WeatherData):
+    """Collection of weather data stored as one typed array per field.
+
+    Uses a fraction of the memory of one WeatherDataItem per day,
+    and lets prediction models read whole columns without getter calls.
+    Columns can also be mapped from a file, without copying, by open.
+    Items returned by get_data are views of the columns.
+    """
+
+    def __init__(self):
+        """
+        """
+        super().__init__()
+        self._columns = _empty_columns()
+        # Number of most recent days kept, or None to keep every day.
+        self._number_days = None
+
+    def load(self, weather_file, cache=False, number_days=None):
+        """Loads a fresh set of weather data from a CSV file.
+
+        Parameters:
+            weather_file (str): Name of the CSV file containing the weather data.
+            cache (bool): Whether to use a binary copy of the file's data,
+                          saved alongside it, instead of parsing the file
+                          again while the file is unchanged.
+            number_days (int): Only keep this many of the most recent days.
+                               The file is then streamed with iter_file,
+                               so memory does not grow with the file size,
+                               and no binary copy is used.
+                               None keeps every day.
+
+        Pre-condition:
+            weather_file != ""
+            weather_file is CSV file containing the accessed columns.
+            number_days is None or number_days > 0
+        """
+        self._number_days = number_days
+        self._generation = next(_generations)
+        self._forget_indexes()
+        if number_days is None:
+            self._columns, self._source = _load_columns(weather_file, cache)
+            return
+        columns = _empty_columns()
+        for chunk in self.iter_file(weather_file):
+            for field, column in columns.items():
+                column.extend(chunk[field])
+                del column[:(-1 * number_days)]
+        self._columns = columns
+        # Streaming does not record where the file was read up to,
+        # so append_from loads it again.
+        self._source = None
+
+    def _reload(self, weather_file):
+        """Loads a CSV file again, as it was first loaded."""
+        self.load(weather_file, number_days=self._number_days)
+
+    def _extend(self, columns):
+        """Adds the days held in columns after the most recent day.
+
+        Parameters:
+            columns (dict): Maps each field name to a column of values.
+        """
+        if not len(columns["rain"]):
+            # nothing is added, so the data keeps its version
+            return
+        self._generation = next(_generations)
+        extended = {}
+        for field, column in self._columns.items():
+            if isinstance(column, memoryview):
+                # Columns mapped from a file are read-only, so are copied.
+                column = array(column.format, column)
+            if field == DATE_COLUMN:
+                column = _joined_dates(column, columns[field])
+            else:
+                column.extend(columns[field])
+            if self._number_days is not None:
+                column = column[(-1 * self._number_days):]
+            extended[field] = column
+        self._columns = extended
+
+    def open(self, column_file):
+        """Maps a file of weather data columns into memory.
+
+        The columns are not copied, so opening takes the same time for any
+        amount of data, and processes opening the same file share its pages.
+
+        Parameters:
+            column_file (str): Name of a file written by save,
+                               or of a sidecar written by load.
+
+        Raises:
+            ValueError: If column_file is not a file of weather data columns.
+        """
+        columns, directions = weather_store.map_columns(column_file)
+        if not set(_FIELD_NAMES).issubset(columns):
+            raise ValueError(f"{column_file} does not hold weather data columns")
+        columns.setdefault(DATE_COLUMN, array("i"))
+        self._generation = next(_generations)
+        self._forget_indexes()
+        self._columns = _recode_directions(columns, directions)
+        self._number_days = None
+        self._source = None
+
+    def save(self, column_file):
+        """Saves the weather data to a file of columns, to be mapped by open.
+
+        Parameters:
+            column_file (str): Name of the file to write.
+        """
+        weather_store.write_columns(column_file, _stored_columns(self._columns),
+                                    WIND_DIRECTIONS)
+
+    def get_data(self, number_days):
+        """Returns a specified number of days of weather data.
+
+        Parameters:
+            number_days (int): Number of days of data to retrieve,
+                               counting backwards from the most recent data item.
+
+        Pre-condition:
+            0 < number_days <= size()
+
+        Return:
+            [WeatherDataItemView] List of WeatherDataItemView objects,
+                                  ordered from oldest to most recent.
+        """
+        return self._get_data(number_days, self.size())
+
+    def _get_data(self, number_days, end):
+        """Returns the days of weather data before a position.
+
+        Parameters:
+            number_days (int): Number of days of data to retrieve.
+            end (int): Position after the most recent day to retrieve.
+
+        Return:
+            [WeatherDataItemView] Views ordered from oldest to most recent.
+        """
+        return [WeatherDataItemView(self._columns, day)
+                for day in range(max(end - number_days, 0), end)]
+
+    def size(self):
+        """(int) Returns the number of days of weather data available,
+                 after loading data from file.
+                 Returns 0 if no data is available."""
+        return len(self._columns["rain"])
+
+    def _sync_columns(self):
+        """Columns are the primary storage, so are always up to date."""
+        pass
+
+
+class WeatherDataView(object):
+    """Weather data of the days up to a position in a WeatherData.
+
+    Shares the data it views rather than copying it, so prediction models
+    can forecast from any point in history.
+    """
+
+    def __init__(self, weather_data, end, columns=None):
+        """
+        Parameters:
+            weather_data (WeatherData): Collection of weather data to view.
+            end (int): Number of days from the start of weather_data to view.
+            columns (dict): Columns of weather_data holding the days, which
+                            are still viewed if the data's columns are
+                            replaced, or None to view its current columns.
+        """
+        self._weather_data = weather_data
+        self._end = end
+        self._columns = columns
+        # Generation of the data when its columns were kept, see version.
+        self._generation = (None if columns is None
+                            else weather_data.version()[0])
+        # The kept columns, once the data's columns have been replaced.
+        self._detached = None
+
+    def _viewed(self):
+        """(WeatherData) Weather data holding the days viewed, at the same
+        positions."""
+        if self._columns is None or self._weather_data._holds(self._columns):
+            return self._weather_data
+        if self._detached is None:
+            # The kept columns are indexed on their own, without copying them.
+            self._detached = ColumnarWeatherData()
+            self._detached._columns = self._columns
+        return self._detached
+
+    def snapshot(self):
+        """(WeatherDataView) The days viewed as they are now, which never
+        change, see WeatherData.snapshot."""
+        if self._columns is not None:
+            return self
+        self._weather_data._sync_columns()
+        return WeatherDataView(self._weather_data, self._end,
+                               self._weather_data._columns)
+
+    def get_data(self, number_days):
+        """Returns a specified number of days of weather data.
+
+        Parameters:
+            number_days (int): Number of days of data to retrieve,
+                               counting backwards from the most recent data item.
+
+        Pre-condition:
+            0 < number_days <= size()
+
+        Return:
+            (list) Items ordered from oldest to most recent.
+        """
+        return self._viewed()._get_data(number_days, self._end)
+
+    def get_column(self, field, number_days):
+        """Returns one field of a specified number of days of weather data.
+
+        Parameters:
+            field (str): Name of a field in FIELDS, e.g. "rain".
+            number_days (int): Number of days of data to retrieve,
+                               counting backwards from the most recent data item.
+
+        Pre-condition:
+            0 < number_days <= size()
+
+        Return:
+            (array) Values of the field, ordered from oldest to most recent.
+        """
+        return self._viewed()._get_column(field, number_days, self._end)
+
+    def window_mean(self, field, number_days):
+        """Returns the mean of one field over a specified number of days.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS, e.g. "rain".
+            number_days (int): Number of days of data to average,
+                               counting backwards from the most recent data item.
+
+        Pre-condition:
+            0 < number_days <= size()
+
+        Return:
+            (float) Mean of the field over the days.
+        """
+        return self._viewed()._window_mean(field, number_days, self._end)
+
+    def window_max(self, field, number_days):
+        """Returns the maximum of one field over a specified number of days.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS, e.g. "rain".
+            number_days (int): Number of days of data to search,
+                               counting backwards from the most recent data item.
+
+        Pre-condition:
+            0 < number_days <= size()
+
+        Return:
+            Largest value of the field over the days.
+        """
+        return self._viewed()._window_extreme(field, number_days,
+                                              self._end, max)
+
+    def window_min(self, field, number_days):
+        """Returns the minimum of one field over a specified number of days.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS, e.g. "rain".
+            number_days (int): Number of days of data to search,
+                               counting backwards from the most recent data item.
+
+        Pre-condition:
+            0 < number_days <= size()
+
+        Return:
+            Smallest value of the field over the days.
+        """
+        return self._viewed()._window_extreme(field, number_days,
+                                              self._end, min)
+
+    def rolling_mean(self, field, number_days):
+        """Returns the mean of one field over the days up to each day viewed,
+        see WeatherData.rolling_mean.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS, e.g. "rain".
+            number_days (int): Number of days in each window.
+
+        Return:
+            (list[float]) Mean of the field over the window ending at each
+                          day, oldest first.
+        """
+        return self._viewed()._rolling_mean(field, number_days, self._end)
+
+    def rolling_max(self, field, number_days):
+        """Returns the maximum of one field over the days up to each day
+        viewed, see WeatherData.rolling_max.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS, e.g. "rain".
+            number_days (int): Number of days in each window.
+
+        Return:
+            (list) Largest value of the field over the window ending at each
+                   day, oldest first.
+        """
+        return self._viewed()._indexed_extremes(
+            field, max).window_extremes(number_days, self._end)
+
+    def rolling_min(self, field, number_days):
+        """Returns the minimum of one field over the days up to each day
+        viewed, see WeatherData.rolling_min.
+
+        Parameters:
+            field (str): Name of a numeric field in FIELDS, e.g. "rain".
+            number_days (int): Number of days in each window.
+
+        Return:
+            (list) Smallest value of the field over the window ending at each
+                   day, oldest first.
+        """
+        return self._viewed()._indexed_extremes(
+            field, min).window_extremes(number_days, self._end)
+
+    def size(self):
+        """(int) Returns the number of days of weather data viewed."""
+        return self._end
+
+    def version(self):
+        """(tuple<int, int>) Token identifying the days viewed, as returned
+        by WeatherData.version."""
+        generation = self._generation
+        if generation is None:
+            generation, _ = self._weather_data.version()
+        return generation, self._end
+
 
 def demo():
     """Demonstrates how to use the WeatherData and WeatherDataItem classes."""
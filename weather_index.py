@@ -0,0 +1,315 @@
+"""
+    Indexes over columns of weather data, answering queries about any
+    window of days without scanning it.
+
+    PrefixSums: Sum of any window of a column in constant time.
+    tenths: Values scaled by ten exactly, to be totalled without error.
+    from_tenths: Value of an exact total of tenths.
+    SparseTable: Maximum or minimum of any window of a column in constant time.
+    KDTree: Days whose values are nearest to a point, in logarithmic time.
+"""
+
+import heapq
+from array import array
+from fractions import Fraction
+from itertools import accumulate, chain, islice, repeat
+from math import isfinite
+from operator import mul, sub, truediv
+
+
+def tenths(values):
+    """Scales values by ten exactly, so they can be totalled without the
+    rounding error of adding floats.
+
+    Weather data is recorded to one decimal place, so each value is
+    normally a whole number of tenths. Any other value is scaled exactly
+    as a Fraction, and values which are not finite are left as floats.
+
+    Parameters:
+        values (iterable): Numbers to scale.
+
+    Return:
+        (list[int or Fraction or float]) Ten times each value.
+    """
+    values = list(values)
+    try:
+        scaled = list(map(round, map(mul, values, repeat(10))))
+    except (OverflowError, ValueError):
+        # an infinite or undefined value, which cannot be rounded
+        scaled = [round(value * 10) if isfinite(value) else value * 10
+                  for value in values]
+    if list(map(truediv, scaled, repeat(10))) != values:
+        scaled = [tenth if tenth / 10 == value
+                  else Fraction(value) * 10 if isfinite(value)
+                  else value * 10
+                  for tenth, value in zip(scaled, values)]
+    return scaled
+
+
+def from_tenths(total):
+    """(float) Value of a total of tenths found by adding values from tenths,
+    correctly rounded."""
+    return float(total / 10)
+
+
+class PrefixSums(object):
+    """Running totals of a column, giving the sum of any window in O(1).
+
+    The totals are kept exactly, in tenths, so the sum of a window is the
+    same however far into the column it starts. The totals are extended,
+    rather than rebuilt, as days are appended.
+    """
+
+    def __init__(self, column):
+        """
+        Parameters:
+            column (array or memoryview): Values to total, oldest first.
+        """
+        self._column = column
+        # self._totals[day] is the sum of the tenths of the values before day,
+        # kept in a list instead once a total is not a 64-bit integer.
+        self._totals = array("q", [0])
+        self.update(column)
+
+    def update(self, column):
+        """Brings the totals up to date with a column.
+
+        Parameters:
+            column (array or memoryview): Values to total, oldest first.
+
+        Return:
+            (bool) True if the totals were extended with the column's new
+                   values, False if column is not the column being totalled
+                   or has fewer values, so the totals must be rebuilt.
+        """
+        totalled = len(self._totals) - 1
+        if column is not self._column or len(column) < totalled:
+            return False
+        if len(column) > totalled:
+            new_totals = accumulate(tenths(column[totalled:]),
+                                    initial=self._totals[-1])
+            # The first running total is the initial one, already stored.
+            new_totals = list(islice(new_totals, 1, None))
+            try:
+                self._totals.extend(array("q", new_totals))
+            except (OverflowError, TypeError):
+                self._totals = list(self._totals)
+                self._totals.extend(new_totals)
+        return True
+
+    def window_sum(self, start, end):
+        """Sum of the values in a window of the column.
+
+        Parameters:
+            start (int): Position of the first value in the window.
+            end (int): Position after the last value in the window.
+
+        Return:
+            (float) Sum of the values from start up to but not including end,
+                    correctly rounded.
+        """
+        return from_tenths(self._totals[end] - self._totals[start])
+
+    def window_sums(self, width, end):
+        """Sums of the values in the window before each position, at once.
+
+        Parameters:
+            width (int): Number of values in each window, which is shorter
+                         for positions fewer than width values in.
+            end (int): Position after the last value of the last window.
+
+        Return:
+            (list[float]) Sum of the window before each position from 1 to
+                          end, each as window_sum would find it.
+        """
+        starts = chain(repeat(self._totals[0], min(width - 1, end)),
+                       self._totals[:max(end + 1 - width, 0)])
+        return list(map(from_tenths, map(sub, self._totals[1:end + 1],
+                                         starts)))
+
+
+class SparseTable(object):
+    """Maximum or minimum of any window of a column in O(1).
+
+    Level k holds the extreme of each window of 2**k values, so any window
+    is covered by two overlapping windows of one level. Building takes
+    O(n log n), and appended days only add the entries that include them.
+    """
+
+    def __init__(self, column, choose=max):
+        """
+        Parameters:
+            column (array or memoryview): Values to index, oldest first.
+            choose (function): max or min, picking the extreme of two values.
+        """
+        self._column = column
+        self._choose = choose
+        self._typecode = getattr(column, "typecode", None) or column.format
+        # Level 0 is the column itself; level k > 0 is self._levels[k - 1].
+        self._levels = []
+        self._size = 0
+        self.update(column)
+
+    def update(self, column):
+        """Brings the table up to date with a column.
+
+        Parameters:
+            column (array or memoryview): Values to index, oldest first.
+
+        Return:
+            (bool) True if the table was extended with the column's new
+                   values, False if column is not the column being indexed
+                   or has fewer values, so the table must be rebuilt.
+        """
+        size = len(column)
+        if column is not self._column or size < self._size:
+            return False
+        if size == self._size:
+            return True
+        lower = column
+        width = 1
+        for level_number in range(1, size.bit_length()):
+            if level_number > len(self._levels):
+                self._levels.append(array(self._typecode))
+            level = self._levels[level_number - 1]
+            # Entry i is the extreme of the values from i to i + 2 * width.
+            built = len(level)
+            last = size - 2 * width
+            level.extend(map(self._choose, lower[built:last + 1],
+                             lower[built + width:last + width + 1]))
+            lower = level
+            width *= 2
+        self._size = size
+        return True
+
+    def window_extreme(self, start, end):
+        """Maximum or minimum of the values in a window of the column.
+
+        Parameters:
+            start (int): Position of the first value in the window.
+            end (int): Position after the last value in the window.
+
+        Pre-condition:
+            start < end
+
+        Return:
+            Most extreme value from start up to but not including end.
+        """
+        level_number = (end - start).bit_length() - 1
+        level = self._levels[level_number - 1] if level_number else self._column
+        return self._choose(level[start], level[end - (1 << level_number)])
+
+    def window_extremes(self, width, end):
+        """Maximum or minimum of the window before each position, at once.
+
+        Parameters:
+            width (int): Number of values in each window, which is shorter
+                         for positions fewer than width values in.
+            end (int): Position after the last value of the last window.
+
+        Return:
+            (list) Most extreme value of the window before each position
+                   from 1 to end.
+        """
+        # windows from the first value, until they are width values long
+        extremes = list(accumulate(self._column[:min(width - 1, end)],
+                                   self._choose))
+        if end >= width:
+            level_number = width.bit_length() - 1
+            level = (self._levels[level_number - 1] if level_number
+                     else self._column)
+            offset = width - (1 << level_number)
+            extremes.extend(map(self._choose, level[:end + 1 - width],
+                                level[offset:end + 1 - width + offset]))
+        return extremes
+
+
+class KDTree(object):
+    """Points split alternately along each dimension, so the points nearest
+    to any other point are found in O(log n) on average.
+
+    The tree is stored implicitly: the points in any range of self._order
+    are split at its middle point, with nearer points before it.
+    """
+
+    def __init__(self, points):
+        """
+        Parameters:
+            points (list[tuple<float, ...>]): Points with the same number of
+                                              dimensions, e.g. one per day.
+        """
+        self._points = points
+        self._dimensions = len(points[0]) if points else 0
+        self._order = array("i", range(len(points)))
+        self._build(0, len(points), 0)
+
+    def _build(self, low, high, axis):
+        """Arranges the points from low up to but not including high.
+
+        Parameters:
+            low (int): Position in self._order of the first point.
+            high (int): Position in self._order after the last point.
+            axis (int): Dimension the points are split along.
+        """
+        if high - low < 2:
+            return
+        points = self._points
+        self._order[low:high] = array("i", sorted(
+            self._order[low:high], key=lambda index: points[index][axis]))
+        middle = (low + high) // 2
+        next_axis = (axis + 1) % self._dimensions
+        self._build(low, middle, next_axis)
+        self._build(middle + 1, high, next_axis)
+
+    def nearest(self, point, number_points):
+        """Finds the points nearest to a point.
+
+        Parameters:
+            point (tuple<float, ...>): Point to search around.
+            number_points (int): Number of points to find.
+
+        Return:
+            (list[int]) Index in points of each of the nearest points,
+                        nearest first. Which of several equally far points
+                        are found is unspecified.
+        """
+        # (negative squared distance, negative index) of the nearest points
+        # so far, so the furthest is first
+        nearest = []
+        self._search(point, number_points, nearest, 0, len(self._order), 0)
+        return [-index for _, index in sorted(nearest, reverse=True)]
+
+    def _search(self, point, number_points, nearest, low, high, axis):
+        """Adds points from low up to but not including high to nearest.
+
+        Parameters:
+            point (tuple<float, ...>): Point to search around.
+            number_points (int): Number of points to find.
+            nearest (list[tuple<float, int>]): Heap of the nearest points.
+            low (int): Position in self._order of the first point.
+            high (int): Position in self._order after the last point.
+            axis (int): Dimension the points are split along.
+        """
+        if low >= high:
+            return
+        middle = (low + high) // 2
+        index = self._order[middle]
+        candidate = self._points[index]
+        distance = sum(difference * difference
+                       for difference in map(sub, point, candidate))
+        if len(nearest) < number_points:
+            heapq.heappush(nearest, (-distance, -index))
+        elif (-distance, -index) > nearest[0]:
+            heapq.heapreplace(nearest, (-distance, -index))
+
+        offset = point[axis] - candidate[axis]
+        next_axis = (axis + 1) % self._dimensions
+        if offset < 0:
+            near, far = (low, middle), (middle + 1, high)
+        else:
+            near, far = (middle + 1, high), (low, middle)
+        self._search(point, number_points, nearest, *near, next_axis)
+        # points beyond the split are at least offset away, so cannot be
+        # nearer than those found unless offset is smaller
+        if len(nearest) < number_points or offset * offset < -nearest[0][0]:
+            self._search(point, number_points, nearest, *far, next_axis)
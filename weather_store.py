@@ -0,0 +1,268 @@
+"""
+    Binary file format for columns of weather data.
+
+    write_columns: Saves named arrays and a table of strings to a file.
+    read_columns: Loads the arrays and strings saved by write_columns.
+    map_columns: Maps the columns saved by write_columns without copying them.
+    write_arrays: Saves named arrays of any lengths and strings to a file.
+    read_arrays: Loads the arrays and strings saved by write_arrays.
+    source_key: Identifies the exact contents of a source file.
+    sidecar_path: Name of the binary file cached alongside a source file.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+
+# First bytes of every column file.
+MAGIC = b"WXCOLUMN"
+# First bytes of every file of arrays, which unlike columns may differ in
+# length.
+ARRAYS_MAGIC = b"WXARRAYS"
+# Incremented whenever the layout of column files changes.
+VERSION = 1
+# Written in native byte order, to reject files from other platforms.
+BYTE_ORDER = 0x01020304
+# Column data starts at a multiple of this many bytes.
+ALIGNMENT = 8
+# Extension added to a source file's name to name its sidecar.
+SIDECAR_EXTENSION = ".wxc"
+
+_HEADER = struct.Struct("=8sIIQ")
+_COUNT = struct.Struct("=I")
+_LENGTH = struct.Struct("=Q")
+
+
+def _pack_string(text):
+    """(bytes) Length prefixed UTF-8 encoding of a string."""
+    encoded = text.encode("utf-8")
+    return _COUNT.pack(len(encoded)) + encoded
+
+
+def _unpack_string(data, offset):
+    """Reads a string written by _pack_string.
+
+    Return:
+        (tuple<str, int>) The string and the offset following it.
+    """
+    (length,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    return bytes(data[offset:offset + length]).decode("utf-8"), offset + length
+
+
+def write_columns(path, columns, strings=(), key=""):
+    """Saves columns of data to a binary file.
+
+    The file is written to a temporary name and then renamed,
+    so readers never see a partially written file.
+
+    Parameters:
+        path (str): Name of the file to write.
+        columns (dict<str, array or memoryview>): Columns of equal length.
+        strings (list[str]): Table of strings to save with the columns.
+        key (str): Identifies the data, checked by read_columns.
+    """
+    number_days = len(next(iter(columns.values()))) if columns else 0
+    _write(path, MAGIC, number_days, columns, strings, key)
+
+
+def write_arrays(path, arrays, strings=(), key=""):
+    """Saves arrays of any lengths to a binary file, laid out as a column
+    file is.
+
+    Parameters:
+        path (str): Name of the file to write.
+        arrays (dict<str, array>): Arrays to save.
+        strings (list[str]): Table of strings to save with the arrays.
+        key (str): Identifies the contents, checked by read_arrays.
+    """
+    _write(path, ARRAYS_MAGIC, 0, arrays, strings, key)
+
+
+def _write(path, magic, number_days, columns, strings, key):
+    """Saves a column file, or a file of arrays.
+
+    Parameters:
+        path (str): Name of the file to write.
+        magic (bytes): MAGIC or ARRAYS_MAGIC.
+        number_days (int): Length of every column, or 0 for arrays.
+        columns (dict<str, array or memoryview>): Columns or arrays.
+        strings (list[str]): Table of strings to save with the columns.
+        key (str): Identifies the data.
+    """
+    parts = [_HEADER.pack(magic, VERSION, BYTE_ORDER, number_days),
+             _pack_string(key), _COUNT.pack(len(strings))]
+    parts.extend(_pack_string(text) for text in strings)
+    parts.append(_COUNT.pack(len(columns)))
+    offset = sum(map(len, parts))
+    for name, column in columns.items():
+        typecode = getattr(column, "typecode", None) or column.format
+        description = _pack_string(name) + typecode.encode("ascii")
+        offset += len(description) + _LENGTH.size
+        padding = -offset % ALIGNMENT
+        offset += padding
+        data = column.tobytes()
+        parts.extend((description, _LENGTH.pack(len(data)),
+                      b"\0" * padding, data))
+        offset += len(data)
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as column_file:
+        column_file.writelines(parts)
+    os.replace(temporary, path)
+
+
+def _parse(data, key, magic=MAGIC):
+    """Finds the strings and columns in the contents of a column file.
+
+    Parameters:
+        data (bytes or mmap): Contents of a file written by write_columns,
+                              or by write_arrays if magic is ARRAYS_MAGIC.
+        key (str): Key the file must have been written with, or None for any.
+        magic (bytes): MAGIC or ARRAYS_MAGIC.
+
+    Return:
+        (tuple<list[str], list[tuple<str, str, int, int>]>)
+            The table of strings, and the name, typecode, offset and
+            length in bytes of each column's data.
+
+    Raises:
+        ValueError: If the data is not a column file of this version,
+                    or was written with a different key.
+    """
+    try:
+        header = _HEADER.unpack_from(data)
+        file_magic, version, byte_order, number_days = header
+        if (file_magic, version, byte_order) != (magic, VERSION, BYTE_ORDER):
+            raise ValueError("Not a column file of this version")
+        file_key, offset = _unpack_string(data, _HEADER.size)
+        if key is not None and file_key != key:
+            raise ValueError("Column file was written for different data")
+        (count,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        strings = []
+        for _ in range(count):
+            text, offset = _unpack_string(data, offset)
+            strings.append(text)
+        (count,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        columns = []
+        for _ in range(count):
+            name, offset = _unpack_string(data, offset)
+            typecode = bytes(data[offset:offset + 1]).decode("ascii")
+            (length,) = _LENGTH.unpack_from(data, offset + 1)
+            offset += 1 + _LENGTH.size
+            offset += -offset % ALIGNMENT
+            itemsize = array(typecode).itemsize
+            if (offset + length > len(data)
+                    or (magic == MAGIC and length != number_days * itemsize)
+                    or length % itemsize):
+                raise ValueError("Column file is truncated")
+            columns.append((name, typecode, offset, length))
+            offset += length
+    except (struct.error, UnicodeDecodeError) as error:
+        raise ValueError("Column file is corrupt") from error
+    return strings, columns
+
+
+def read_columns(path, key=None):
+    """Loads columns of data saved by write_columns.
+
+    Parameters:
+        path (str): Name of the file to read.
+        key (str): Key the file must have been written with, or None for any.
+
+    Return:
+        (tuple<dict<str, array>, list[str]>) The columns and table of strings.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file is not a valid column file for key.
+    """
+    with open(path, "rb") as column_file:
+        data = column_file.read()
+    strings, layout = _parse(data, key)
+    columns = {}
+    for name, typecode, offset, length in layout:
+        column = array(typecode)
+        column.frombytes(data[offset:offset + length])
+        columns[name] = column
+    return columns, strings
+
+
+def read_arrays(path, key=None):
+    """Loads arrays saved by write_arrays.
+
+    Parameters:
+        path (str): Name of the file to read.
+        key (str): Key the file must have been written with, or None for any.
+
+    Return:
+        (tuple<dict<str, array>, list[str]>) The arrays and table of strings.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file is not a valid file of arrays for key.
+    """
+    with open(path, "rb") as array_file:
+        data = array_file.read()
+    strings, layout = _parse(data, key, ARRAYS_MAGIC)
+    arrays = {}
+    for name, typecode, offset, length in layout:
+        values = array(typecode)
+        values.frombytes(data[offset:offset + length])
+        arrays[name] = values
+    return arrays, strings
+
+
+def map_columns(path, key=None):
+    """Maps columns of data saved by write_columns into memory.
+
+    The columns are views of the operating system's page cache rather than
+    copies, so opening is independent of the amount of data and processes
+    mapping the same file share its memory.
+
+    Parameters:
+        path (str): Name of the file to map.
+        key (str): Key the file must have been written with, or None for any.
+
+    Return:
+        (tuple<dict<str, memoryview>, list[str]>) Read-only view of each
+            column, cast to its typecode, and the table of strings.
+
+    Raises:
+        OSError: If the file cannot be opened.
+        ValueError: If the file is not a valid column file for key.
+    """
+    with open(path, "rb") as column_file:
+        # The mapping stays open while any view of it exists.
+        mapped = mmap.mmap(column_file.fileno(), 0, access=mmap.ACCESS_READ)
+    strings, layout = _parse(mapped, key)
+    data = memoryview(mapped)
+    columns = {name: data[offset:offset + length].cast(typecode)
+               for name, typecode, offset, length in layout}
+    return columns, strings
+
+
+def source_key(path, contents):
+    """Identifies the exact contents of a file.
+
+    Parameters:
+        path (str): Name of the file.
+        contents (bytes): Contents of the file.
+
+    Return:
+        (str) The file's absolute path, size, modification time and
+              content hash, which change whenever the file does.
+    """
+    status = os.stat(path)
+    digest = hashlib.blake2b(contents, digest_size=16).hexdigest()
+    return (f"{os.path.abspath(path)}:{len(contents)}:"
+            f"{status.st_mtime_ns}:{digest}")
+
+
+def sidecar_path(path):
+    """(str) Name of the column file cached alongside a source file."""
+    return path + SIDECAR_EXTENSION